@@ -1,11 +1,13 @@
 import random
 
 class Player:
-    def __init__(self, name, health, attack, defense, special_attack_name, special_attack_damage):
+    def __init__(self, name, health, attack, defense, special_attack_name, special_attack_damage, rng=None):
+        """rng: the match's random.Random; the global random module if None."""
+        rng = rng or random
         self.name = name
         self.health = health
         self.attack = attack
-        self.mana = random.randint(80, 120)
+        self.mana = rng.randint(80, 120)
         self.defense = defense
         self.special_attack_name = special_attack_name
         self.special_attack_damage = special_attack_damage
@@ -68,7 +68,9 @@ class wizard_bot:
         return self.mana >= value
 
 
-def wizard_bot_turn(bot, player):
+def wizard_bot_turn(bot, player, rng=None):
+    """Pick the bot's move; rng is the match's random.Random (global random if None)."""
+    rng = rng or random
     # safety
     if bot.difficulty < 0:
         bot.difficulty = 0
@@ -76,11 +78,11 @@ def wizard_bot_turn(bot, player):
         bot.difficulty = 5
     # easy/medium mode
     if bot.difficulty <= 3:
-        number = random.randint(1, 5)
+        number = rng.randint(1, 5)
         if number == 1:
             bot.set_state("Resting")
         elif number == 2:
-            bot.set_state("Attacking")
+            bot.set_state("Attack")
         elif number == 3:
             bot.set_state("Defending")
         elif number == 4:
@@ -92,7 +94,7 @@ def wizard_bot_turn(bot, player):
     if bot.get_mana() == 0:
         bot.set_state("Resting")
     elif player.get_health() <= bot.get_attack() and bot.has_enough_mana(10):
-        bot.set_state("Attacking")
+        bot.set_state("Attack")
     elif bot.get_health() <= player.get_attack() and bot.has_enough_mana(20):
         bot.set_state("Defending")
     elif bot.get_health() <= 30 and bot.has_enough_mana(30):
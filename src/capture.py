@@ -0,0 +1,341 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def fourcc_name(code):
+    """Four-character pixel format name for a CAP_PROP_FOURCC value."""
+    code = int(code)
+    return "".join(chr((code >> shift) & 0xFF) for shift in (0, 8, 16, 24)).strip("\0")
+
+
+class CameraSource:
+    """Live frames from a cv2.VideoCapture device. Timestamps come from the grabber.
+
+    Cameras often fall back to slow uncompressed modes unless asked for a
+    compressed pixel format, so the requested ``formats`` (fourcc codes such
+    as "MJPG" or "YUYV") are tried in order, each with the requested
+    resolution and frame rate, until the device grants one. Whatever the
+    device ends up delivering is read back into ``granted``.
+    """
+
+    realtime = True
+
+    def __init__(self, index=0, width=1920, height=1080, fps=None, formats=None):
+        self.name = f"camera {index}"
+        self.cap = cv2.VideoCapture(index)
+        self.finished = False
+        self.requested = {"width": width, "height": height, "fps": fps, "formats": formats}
+        self.granted = {}
+        """format, width, height and fps the device actually delivers"""
+        if self.cap.isOpened():
+            self._negotiate(width, height, fps, formats or [None])
+
+    def _negotiate(self, width, height, fps, formats):
+        for pixel_format in formats:
+            # Some backends only apply the format before the resolution is set.
+            if pixel_format is not None:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*pixel_format))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if fps:
+                self.cap.set(cv2.CAP_PROP_FPS, fps)
+            self.granted = {
+                "format": fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC)),
+                "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            }
+            if pixel_format is None or self.granted["format"] == pixel_format:
+                break
+            logging.info(f"{self.name} refused pixel format {pixel_format}")
+        logging.info(
+            f"{self.name} requested {width}x{height} at {fps or 'default'} fps "
+            f"({'/'.join(f for f in formats if f) or 'default format'}), granted "
+            f"{self.granted['width']}x{self.granted['height']} at {self.granted['fps']:g} fps "
+            f"({self.granted['format'] or 'unknown format'})"
+        )
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        """Return (ok, bgr_frame, timestamp_ms); timestamp_ms is None for live sources."""
+        ret, frame = self.cap.read()
+        return ret, frame, None
+
+    def release(self):
+        self.cap.release()
+
+
+class _RecordedSource:
+    """Shared pacing and synthetic timestamps for sources read from disk.
+
+    Frame i gets timestamp i * 1000 / fps unless the recording has its own.
+    With ``realtime`` off, frames are returned as fast as they can be decoded;
+    with it on, reads are paced to the recording's frame rate.
+    """
+
+    def __init__(self, fps, realtime):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.finished = False
+        self.frame_index = 0
+        self._started = None
+
+    def _timestamp_ms(self):
+        return int(round(self.frame_index * 1000 / self.fps))
+
+    def _pace(self, timestamp_ms):
+        if not self.realtime:
+            return
+        if self._started is None:
+            self._started = time.monotonic() - timestamp_ms / 1000
+        delay = self._started + timestamp_ms / 1000 - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _deliver(self, frame, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = self._timestamp_ms()
+        self._pace(timestamp_ms)
+        self.frame_index += 1
+        return True, frame, timestamp_ms
+
+    def _end(self):
+        self.finished = True
+        return False, None, None
+
+
+class VideoFileSource(_RecordedSource):
+    """Frames decoded from a video file."""
+
+    def __init__(self, path, realtime=False):
+        self.name = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS), realtime)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return self._end()
+        return self._deliver(frame)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource(_RecordedSource):
+    """Frames from a directory of images or an .npz file.
+
+    An .npz needs a ``frames`` array of shape (n, height, width, 3) in BGR
+    order, like camera frames, and may carry matching ``timestamps_ms``.
+    """
+
+    def __init__(self, path, fps=30.0, realtime=False):
+        super().__init__(fps, realtime)
+        self.name = path
+        self.timestamps_ms = None
+        if path.endswith(".npz"):
+            with np.load(path) as recording:
+                self.frames = recording["frames"]
+                if "timestamps_ms" in recording:
+                    self.timestamps_ms = recording["timestamps_ms"].astype(np.int64)
+            self.paths = None
+        else:
+            self.paths = sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self.frames = None
+
+    def __len__(self):
+        return len(self.frames) if self.frames is not None else len(self.paths)
+
+    def isOpened(self):
+        return len(self) > 0
+
+    def read(self):
+        if self.frame_index >= len(self):
+            return self._end()
+        if self.frames is not None:
+            frame = self.frames[self.frame_index]
+        else:
+            frame = cv2.imread(self.paths[self.frame_index])
+            if frame is None:
+                logging.error(f"Could not read image {self.paths[self.frame_index]}")
+                return self._end()
+        timestamp_ms = None
+        if self.timestamps_ms is not None:
+            timestamp_ms = int(self.timestamps_ms[self.frame_index])
+        return self._deliver(frame, timestamp_ms)
+
+    def release(self):
+        self.frames = None
+
+
+def open_source(spec, width=1920, height=1080, realtime=True, fps=None, formats=None):
+    """Open a frame source from a camera index, video file, image directory or .npz.
+
+    ``width``, ``height``, ``fps`` and ``formats`` only apply to cameras.
+    """
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec), width, height, fps, formats)
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"Frame source not found: {spec}")
+    if os.path.isdir(spec) or spec.endswith(".npz"):
+        return ImageSequenceSource(spec, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
+
+
+class FrameGrabber:
+    """Reads frames from a source on a background thread into a small ring buffer.
+
+    The consumer always takes the newest frame; anything captured in between
+    that nobody read is counted as dropped instead of queueing up, so a slow
+    inference or render step never works on stale frames and never blocks
+    camera I/O.
+
+    With ``lossless`` set (used for recorded sources that aren't paced in real
+    time) the grabber instead waits for the consumer and hands out every frame
+    in order, which keeps offline runs deterministic.
+    """
+
+    def __init__(self, source, buffer_size=2, lossless=False, latency=None):
+        self.source = source
+        self.lossless = lossless
+        self.latency = latency
+        """latency.LatencyRecorder that source reads are timed into, if any"""
+        self.buffer = deque(maxlen=buffer_size)
+        """(frame_id, timestamp_ms, frame, captured_at) tuples, newest last"""
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self._last_consumed_id = 0
+        self._last_timestamp_ms = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="FrameGrabber", daemon=True
+        )
+        self._thread.start()
+        logging.debug("FrameGrabber started")
+
+    def stop(self):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        logging.debug(
+            f"FrameGrabber stopped: captured={self.frames_captured}, "
+            f"dropped={self.frames_dropped}, read_failures={self.read_failures}"
+        )
+
+    def _next_timestamp_ms(self, source_timestamp_ms):
+        if source_timestamp_ms is None:
+            source_timestamp_ms = int(time.monotonic() * 1000)
+        # detect_async needs strictly increasing timestamps.
+        timestamp_ms = max(source_timestamp_ms, self._last_timestamp_ms + 1)
+        self._last_timestamp_ms = timestamp_ms
+        return timestamp_ms
+
+    def _run(self):
+        while self._running:
+            read_started = time.perf_counter()
+            ret, frame, source_timestamp_ms = self.source.read()
+            captured_at = time.perf_counter()
+            if not ret:
+                if self.source.finished:
+                    logging.info(f"Frame source {self.source.name} finished")
+                    break
+                self.read_failures += 1
+                time.sleep(0.005)
+                continue
+            if self.latency is not None:
+                self.latency.record("read", (captured_at - read_started) * 1000)
+            timestamp_ms = self._next_timestamp_ms(source_timestamp_ms)
+            with self._condition:
+                while (
+                    self.lossless
+                    and self._running
+                    and self.frames_captured - self._last_consumed_id >= self.buffer.maxlen
+                ):
+                    self._condition.wait()
+                self.frames_captured += 1
+                self.buffer.append((self.frames_captured, timestamp_ms, frame, captured_at))
+                self._condition.notify_all()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def latest(self):
+        """Return the next frame to process, or None.
+
+        Frames come as (frame_id, timestamp_ms, bgr_frame, captured_at), where
+        captured_at is the time.perf_counter() value when the read returned.
+        """
+        with self._condition:
+            return self._take_latest()
+
+    def wait_for_frame(self, timeout=1.0):
+        """Block until a frame newer than the last one consumed is available.
+
+        Returns None on timeout, or once the source has finished and every
+        buffered frame has been handed out.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._running and self._newest_id() <= self._last_consumed_id:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            return self._take_latest()
+
+    def _newest_id(self):
+        return self.buffer[-1][0] if self.buffer else 0
+
+    def _take_latest(self):
+        if self._newest_id() <= self._last_consumed_id:
+            return None
+        if self.lossless:
+            entry = next(
+                entry for entry in self.buffer if entry[0] > self._last_consumed_id
+            )
+        else:
+            entry = self.buffer[-1]
+        frame_id = entry[0]
+        self.frames_dropped += frame_id - self._last_consumed_id - 1
+        self._last_consumed_id = frame_id
+        self._condition.notify_all()
+        return entry
+
+    def stats(self):
+        return {
+            "captured": self.frames_captured,
+            "dropped": self.frames_dropped,
+            "read_failures": self.read_failures,
+        }
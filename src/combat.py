@@ -0,0 +1,258 @@
+"""Headless combat rules.
+
+Resolves one turn of moves for any number of fighters from a rules table and
+returns the new fighter states plus an immutable list of events. Nothing here
+touches pygame, the log window or sounds, so the engine, the AI and
+simulators can all call it in a tight loop.
+"""
+
+import random
+from collections import namedtuple
+
+import numpy as np
+
+MOVES = ("Resting", "Defending", "Attack", "Healing", "Special Attack")
+"""Move names, indexed by move codes (also the codes imaging.classify_poses returns)"""
+RESTING, DEFENDING, ATTACK, HEALING, SPECIAL_ATTACK = range(len(MOVES))
+MOVE_ALIASES = {"Attacking": "Attack"}
+"""Other names some callers use for a move"""
+
+RULES = {
+    "mana_cost": {"Attack": 20, "Defending": 20, "Healing": 30, "Special Attack": 50},
+    "rest_mana": (20, 35),
+    "heal_health": (15, 30),
+    "attack_multiplier": {"Resting": 1.5},
+    "special_attack_multiplier": 2,
+    "defense_full_chance": 0.5,
+    "defense_reduction": (0.4, 0.8),
+}
+"""Combat constants: mana costs per move, randint ranges for resting and
+healing, damage multipliers by the target's move (1 otherwise), and how
+likely a defense is to block fully or else how much it reduces damage."""
+
+Fighter = namedtuple("Fighter", ["health", "mana", "attack", "defense"])
+"""State of one fighter between turns"""
+Event = namedtuple("Event", ["kind", "actor", "move", "target", "amount"])
+"""Something that happened during a turn; actor and target are fighter indices.
+
+kind is one of attack, special_attack, defended_fully, defended_partly (amount
+is the damage reduction in percent), defend, rest (amount is mana), heal
+(amount is health) and no_mana (move is the move that could not be paid for).
+"""
+TurnOutcome = namedtuple("TurnOutcome", ["fighters", "events"])
+"""Fighter states after a turn and the events of the turn, both tuples"""
+FIGHTER_DTYPE = np.dtype(
+    [("health", "<i8"), ("mana", "<i8"), ("attack", "<i8"), ("defense", "<i8")]
+)
+"""Structured dtype of a Fighter, for resolve_turns"""
+
+NO_MANA_VERBS = {
+    "Attack": "attack",
+    "Defending": "defend",
+    "Healing": "heal",
+    "Special Attack": "use a special attack",
+}
+
+
+def match_rng(seed=None):
+    """Return (seed, random.Random) for one match.
+
+    Without a seed a fresh one is drawn, so it can still be logged; playing a
+    match again with the same seed and moves reproduces it exactly.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+    return seed, random.Random(seed)
+
+
+def normalize_move(move):
+    return MOVE_ALIASES.get(move, move)
+
+
+def fighter(player):
+    """Fighter state of a Player (or anything with the same getters)."""
+    return Fighter(player.get_health(), player.get_mana(), player.get_attack(), player.get_defense())
+
+
+def defense_efficiency(rng=random, rules=RULES):
+    """Return a tuple (fully_efficient, reduction).
+    - fully_efficient is True defense_full_chance of the time (50%).
+    - If not fully efficient, reduction is drawn from defense_reduction (40% to 80%)."""
+    fully_efficient = rng.random() < rules["defense_full_chance"]
+    reduction = rng.uniform(*rules["defense_reduction"])
+    return fully_efficient, reduction
+
+
+def default_targets(fighters):
+    """Target of each fighter: the next one after it still standing, wrapping around.
+
+    In a two-fighter match each fighter targets the other.
+    """
+    count = len(fighters)
+    targets = []
+    for index in range(count):
+        target = (index + 1) % count
+        for offset in range(1, count):
+            if fighters[(index + offset) % count].health > 0:
+                target = (index + offset) % count
+                break
+        targets.append(target)
+    return tuple(targets)
+
+
+def resolve_turn(fighters, moves, targets=None, rng=random, rules=RULES):
+    """Resolve one turn in which every fighter makes one move.
+
+    Every fighter acts on the state at the start of the turn, so the result
+    does not depend on who is listed first; fighters already at 0 health or
+    below sit the turn out. Random draws happen in fighter order.
+    """
+    fighters = tuple(fighters)
+    moves = [normalize_move(move) for move in moves]
+    if targets is None:
+        targets = default_targets(fighters)
+    health = [state.health for state in fighters]
+    mana = [state.mana for state in fighters]
+    events = []
+
+    for index, (state, move) in enumerate(zip(fighters, moves)):
+        if state.health <= 0:
+            continue
+        target = targets[index]
+        cost = rules["mana_cost"].get(move, 0)
+        if state.mana < cost:
+            events.append(Event("no_mana", index, move, None, None))
+            continue
+        mana[index] -= cost
+
+        if move == "Attack":
+            target_move = moves[target]
+            if target_move == "Defending":
+                damage = max(state.attack - fighters[target].defense, 0)
+                fully_efficient, reduction = defense_efficiency(rng, rules)
+                if fully_efficient:
+                    damage = 0
+                    events.append(Event("defended_fully", index, move, target, None))
+                else:
+                    damage = int(damage * (1 - reduction))
+                    events.append(
+                        Event("defended_partly", index, move, target, int(reduction * 100))
+                    )
+            elif target_move in rules["attack_multiplier"]:
+                damage = int(state.attack * rules["attack_multiplier"][target_move])
+            else:
+                damage = state.attack
+            health[target] -= damage
+            events.append(Event("attack", index, move, target, damage))
+        elif move == "Defending":
+            events.append(Event("defend", index, move, None, None))
+        elif move == "Resting":
+            mana_gain = rng.randint(*rules["rest_mana"])
+            mana[index] += mana_gain
+            events.append(Event("rest", index, move, None, mana_gain))
+        elif move == "Healing":
+            health_gain = rng.randint(*rules["heal_health"])
+            health[index] += health_gain
+            events.append(Event("heal", index, move, None, health_gain))
+        elif move == "Special Attack":
+            damage = state.attack * rules["special_attack_multiplier"]
+            health[target] -= damage
+            events.append(Event("special_attack", index, move, target, damage))
+
+    return TurnOutcome(
+        tuple(
+            state._replace(health=health[index], mana=mana[index])
+            for index, state in enumerate(fighters)
+        ),
+        tuple(events),
+    )
+
+
+def describe(event, names):
+    """Log message for an event; ``names`` are the fighters' display names."""
+    actor = names[event.actor]
+    target = names[event.target] if event.target is not None else None
+    if event.kind == "attack":
+        return f"{actor} attacks {target} for {event.amount} damage!"
+    if event.kind == "special_attack":
+        return f"{actor} uses a special attack on {target} for {event.amount} damage!"
+    if event.kind == "defended_fully":
+        return f"{target} defended fully against {actor}'s attack!"
+    if event.kind == "defended_partly":
+        return f"{target} defended inefficiently, reducing damage by {event.amount}%!"
+    if event.kind == "defend":
+        return f"{actor} is defending this turn!"
+    if event.kind == "rest":
+        return f"{actor} rests and gains {event.amount} mana!"
+    if event.kind == "heal":
+        return f"{actor} heals and gains {event.amount} health!"
+    if event.kind == "no_mana":
+        return f"{actor} tried to {NO_MANA_VERBS[event.move]} but didn't have enough mana!"
+    raise ValueError(f"Unknown combat event {event.kind}")
+
+
+def fighter_array(matches):
+    """(num_matches, 2) FIGHTER_DTYPE array from a sequence of Fighter pairs."""
+    states = np.zeros((len(matches), 2), dtype=FIGHTER_DTYPE)
+    for field in FIGHTER_DTYPE.names:
+        states[field] = [[getattr(state, field) for state in pair] for pair in matches]
+    return states
+
+
+def resolve_turns(states, moves, rng, rules=RULES):
+    """Resolve one turn of many two-fighter matches at once.
+
+    ``states`` is a (num_matches, 2) FIGHTER_DTYPE array, ``moves`` a matching
+    array of move codes (indices into MOVES) and ``rng`` a
+    numpy.random.Generator. Applies the same rules as resolve_turn, each
+    fighter targeting the other, with the random draws made in bulk; returns
+    the new states and leaves ``states`` untouched. Matches in which a
+    fighter is already down are carried over unchanged.
+    """
+    moves = np.asarray(moves, dtype=np.int64)
+    health = states["health"]
+    mana = states["mana"]
+    attack = states["attack"]
+    acting = np.all(health > 0, axis=1, keepdims=True) & np.ones_like(moves, dtype=bool)
+
+    costs = np.array([rules["mana_cost"].get(move, 0) for move in MOVES], dtype=np.int64)
+    cost = costs[moves]
+    paid = acting & (mana >= cost)
+    target_moves = moves[:, ::-1]
+    target_defense = states["defense"][:, ::-1]
+    shape = moves.shape
+
+    # Draw every random quantity for every fighter, then keep the ones used.
+    fully_efficient = rng.random(shape) < rules["defense_full_chance"]
+    reduction = rng.uniform(*rules["defense_reduction"], size=shape)
+    rest_low, rest_high = rules["rest_mana"]
+    heal_low, heal_high = rules["heal_health"]
+    mana_gain = rng.integers(rest_low, rest_high + 1, size=shape)
+    health_gain = rng.integers(heal_low, heal_high + 1, size=shape)
+
+    multipliers = np.ones(len(MOVES))
+    for move, multiplier in rules["attack_multiplier"].items():
+        multipliers[MOVES.index(move)] = multiplier
+    defended = np.maximum(attack - target_defense, 0)
+    defended = np.where(
+        fully_efficient, 0, np.trunc(defended * (1 - reduction)).astype(np.int64)
+    )
+    attack_damage = np.where(
+        target_moves == DEFENDING,
+        defended,
+        np.trunc(attack * multipliers[target_moves]).astype(np.int64),
+    )
+    damage = np.select(
+        [paid & (moves == ATTACK), paid & (moves == SPECIAL_ATTACK)],
+        [attack_damage, attack * rules["special_attack_multiplier"]],
+        0,
+    )
+
+    resolved = states.copy()
+    resolved["mana"] = (
+        mana - np.where(paid, cost, 0) + np.where(paid & (moves == RESTING), mana_gain, 0)
+    )
+    resolved["health"] = (
+        health + np.where(paid & (moves == HEALING), health_gain, 0) - damage[:, ::-1]
+    )
+    return resolved
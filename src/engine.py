@@ -1,4 +1,5 @@
-import random
+import argparse
+
 import pygame
 from particles import ParticleEffect
 
@@ -16,12 +17,16 @@ from Player_List import (
 import imaging
 import yaml
 import os
-import cv2  # For color conversion
 import logging
 import time
 import ai
+import combat
 import sounds
 import spritesheet
+import presenter
+import latency
+import panel
+import text_cache
 
 # Ensure Pygame is initialized before anything else
 pygame.init()
@@ -30,6 +35,7 @@ pygame.font.init()  # Explicitly initialize the font module
 # Game Constants
 ROUND_TIME = 60  # Total time for the entire battle (seconds)
 TURN_TIME = 5  # Each turn lasts 5 seconds
+PLAYER_PANEL_HEIGHT = 100  # Vertical space per player's bars in the GUI
 
 # Set up logging
 logging.basicConfig(
@@ -42,18 +48,6 @@ logging.basicConfig(
 logging.info(f"NEW SESSION ID: {time.time()}")
 
 
-def calculate_defense_efficiency():
-    """Return a tuple (fully_efficient, reduction).
-    - fully_efficient is True 50% of the time.
-    - If not fully efficient, reduction is between 40% and 80% (as a fraction)."""
-    fully_efficient = random.choice([True, False])
-    reduction = random.uniform(0.4, 0.8)
-    logging.debug(
-        f"Defense efficiency calculated: fully_efficient={fully_efficient}, reduction={reduction}"
-    )
-    return fully_efficient, reduction
-
-
 class LogWindow:
     def __init__(self, rect):
         """
@@ -86,28 +80,48 @@ class LogWindow:
             self.messages.pop(0)
         logging.debug(f"Message added to LogWindow: {message}")
 
-    def update(self, surface):
-        # Draw a background for the log area.
-        pygame.draw.rect(surface, (30, 30, 30), self.rect)
-        
-        # Draw sprites next to health bars if loaded
-        if self.player1_sprite:
-            surface.blit(self.player1_sprite, (self.rect.x + 220, 50))
-        if self.player2_sprite:
-            surface.blit(self.player2_sprite, (self.rect.x + 220, 150))
-        
+    def widgets(self):
+        """panel.Widgets for the log area: its background, one per line and the sprites."""
+        widgets = [panel.Widget("log", self.rect, None, (30, 30, 30), _paint_nothing)]
         y = self.rect.y + 10
-        for message in self.messages:
-            text_surface = self.font.render(message, True, (255, 255, 255))
-            surface.blit(text_surface, (self.rect.x + 10, y))
+        for index, message in enumerate(self.messages):
+            line_rect = pygame.Rect(self.rect.x + 10, y, self.rect.width - 20, 30)
+            widgets.append(
+                panel.Widget(("log", index), line_rect, message, (30, 30, 30), self._paint_line)
+            )
             y += 30
-        logging.debug("LogWindow updated")
+        # Sprites next to health bars, if loaded
+        for index, (sprite, y) in enumerate(
+            ((self.player1_sprite, 50), (self.player2_sprite, 150))
+        ):
+            if sprite:
+                sprite_rect = sprite.get_rect(topleft=(self.rect.x + 220, y))
+                widgets.append(
+                    panel.Widget(("sprite", index), sprite_rect, sprite, None, _paint_sprite)
+                )
+        return widgets
+
+    def _paint_line(self, surface, rect, message):
+        text_surface = text_cache.render(self.font, message, (255, 255, 255))
+        surface.blit(text_surface, rect.topleft)
+
+
+def _paint_nothing(surface, rect, state):
+    pass
+
+
+def _paint_sprite(surface, rect, sprite):
+    surface.blit(sprite, rect.topleft)
 
 
 class GameEngine:
-    def __init__(self, player1, player2):
-        self.player1 = player1
-        self.player2 = player2
+    def __init__(self, *players, rng=None):
+        """players: two or more Player objects; more than two plays a free-for-all.
+        rng: random.Random for every draw of the match (see combat.match_rng)."""
+        if len(players) < 2:
+            raise ValueError("GameEngine needs at least two players")
+        self.players = list(players)
+        self.rng = rng if rng is not None else combat.match_rng()[1]
         # Create a display of 1368x720.
         self.screen = pygame.display.set_mode((1920, 1080))
         # self.screen = pygame.display.get_surface()
@@ -121,18 +135,26 @@ class GameEngine:
         
         
 
-        # Set up a dedicated GUI surface for the right half.
-        # Right half occupies x = 684 to 1368.
-        self.gui_surface = pygame.Surface((1920 // 2, 1080))
-        # Positions for health/mana bars (relative to the GUI surface).
-        self.p1_health_rect = pygame.Rect(16, 50, 200, 20)
-        self.p1_mana_rect = pygame.Rect(16, 80, 200, 20)
-        self.p2_health_rect = pygame.Rect(16, 150, 200, 20)
-        self.player1_action = "Idle"  # Default action state
-        self.player2_action = "Idle"  # Default action state
-        self.p2_mana_rect = pygame.Rect(16, 180, 200, 20)
-        # Log window area on the GUI surface.
-        self.log_rect = pygame.Rect(16, 250, (1920 - 100) // 2, 980)
+        # Set up a dedicated GUI panel for the right half, x = 960 to 1920.
+        # It only repaints the widgets that changed since the last frame.
+        self.gui_panel = panel.Panel(self.screen, (1920 // 2, 0), (1920 // 2, 1080))
+        self.camera_rect = pygame.Rect(0, 0, 1920 // 2, 1080)
+        self._camera_key = False  # nothing presented yet
+        # Positions for health/mana bars (relative to the GUI surface), one
+        # PLAYER_PANEL_HEIGHT row per player.
+        self.health_rects = [
+            pygame.Rect(16, 50 + index * PLAYER_PANEL_HEIGHT, 200, 20)
+            for index in range(len(self.players))
+        ]
+        self.mana_rects = [
+            pygame.Rect(16, 80 + index * PLAYER_PANEL_HEIGHT, 200, 20)
+            for index in range(len(self.players))
+        ]
+        self.player_actions = ["Idle"] * len(self.players)  # Default action state
+        # Log window area on the GUI surface, below the player rows.
+        self.log_rect = pygame.Rect(
+            16, 50 + len(self.players) * PLAYER_PANEL_HEIGHT, (1920 - 100) // 2, 980
+        )
         self.log_window = LogWindow(self.log_rect)
         
         # self.log_window.load_sprites(player1.get_name(), player2.get_name())[24]
@@ -141,375 +163,269 @@ class GameEngine:
         self.sprite_manager = spritesheet.SpriteManager()
         self.sound_manager = sounds.SoundManager()
 
+        # Camera frames go to the left half, both during scans and between turns.
+        self.frame_presenter = presenter.FramePresenter((1920 // 2, 1080))
+        # One camera + landmarker session for the whole match.
+        self.pose_session = imaging.PoseSession(
+            frame_presenter=self.frame_presenter, num_players=len(self.players)
+        )
+        self.pose_session.start()
+
+    def shutdown(self):
+        """Release the camera/landmarker session and close the window."""
+        self.running = False
+        self.pose_session.stop()
+        pygame.quit()
+        logging.info("GameEngine shut down")
+
     def update_camera_view(self):
         """
         Update the left half of the window with the latest camera frame.
-        Assumes that imaging.to_window (global) is a BGR numpy array.
+        The skeleton is drawn by the pose session only when the frame is shown.
+        Returns the screen rects that changed: none if the frame is the one
+        already on screen.
         """
         try:
-            if imaging.to_window is not None:
-                # Convert BGR to RGB.
-                frame_rgb = cv2.cvtColor(imaging.to_window, cv2.COLOR_BGR2RGB)
-                # Create a Pygame surface from the numpy array.
-                frame_surface = pygame.surfarray.make_surface(frame_rgb.swapaxes(0, 1))
-                # Scale frame to fill the left half (684x720).
-                frame_surface = pygame.transform.scale(frame_surface, (1920//2, 1080))
-                self.screen.blit(frame_surface, (0, 0))
+            display_frame = self.pose_session.display_frame()
+            camera_key = self.pose_session.displayed_key if display_frame is not None else None
+            if camera_key == self._camera_key:
+                return []
+            self._camera_key = camera_key
+            if display_frame is not None:
+                self.frame_presenter.present(display_frame, self.screen, self.camera_rect.topleft)
                 logging.debug("Camera view updated with new frame")
             else:
-                pygame.draw.rect(self.screen, (0, 0, 0), (0, 0, 1920//2, 1080))
+                pygame.draw.rect(self.screen, (0, 0, 0), self.camera_rect)
                 logging.debug("Camera view updated with black screen")
+            return [self.camera_rect]
         except pygame.error as e:
             logging.error(f"Pygame error in update_camera_view: {e}")
+            return []
 
     def update_gui(self):
         """
-        Draw the GUI on the right half: background, health/mana bars, and log window.
+        Draw the GUI on the right half: health/mana bars, names and the log window.
+        Only widgets whose content changed are repainted; returns their screen rects.
         """
         self.particle_effects = []
-        self.gui_surface.fill((50, 50, 50))
-        # Draw health/mana bars for player1.
-        p1_health_width = int((self.player1.get_health() / 100) * 200)
-        pygame.draw.rect(
-            self.gui_surface,
-            (255, 0, 0),
-            (
-            self.p1_health_rect.x,
-            self.p1_health_rect.y,
-            p1_health_width,
-            self.p1_health_rect.height,
-            ),
-        )
-        # Draw player1's name above the health bar
-        player1_name_surface = self.log_window.font.render(self.player1.get_name(), True, (255, 255, 255))
-        self.gui_surface.blit(player1_name_surface, (self.p1_health_rect.x, self.p1_health_rect.y - 25))
-        p1_mana_width = int((self.player1.get_mana() / 100) * 200)
-        pygame.draw.rect(
-            self.gui_surface,
-            (0, 0, 255),
-            (
-                self.p1_mana_rect.x,
-                self.p1_mana_rect.y,
-                p1_mana_width,
-                self.p1_mana_rect.height,
-            ),
-        )
-        
-        # Add health number for player1
-        health_text = self.log_window.font.render(f"Health: {self.player1.get_health()}", True, (255, 255, 255))
-        self.gui_surface.blit(health_text, (226, 50))
-        
-        # Draw health/mana bars for player2.
-        p2_health_width = int((self.player2.get_health() / 100) * 200)
-        pygame.draw.rect(
-            self.gui_surface,
-            (255, 0, 0),
-            (
-            self.p2_health_rect.x,
-            self.p2_health_rect.y,
-            p2_health_width,
-            self.p2_health_rect.height,
-            ),
-        )
-        # Draw player2's name above the health bar
-        player2_name_surface = self.log_window.font.render(self.player2.get_name(), True, (255, 255, 255))
-        self.gui_surface.blit(player2_name_surface, (self.p2_health_rect.x, self.p2_health_rect.y - 25))
-        p2_mana_width = int((self.player2.get_mana() / 100) * 200)
-        pygame.draw.rect(
-            self.gui_surface,
-            (0, 0, 255),
-            (
-            self.p2_mana_rect.x,
-            self.p2_mana_rect.y,
-            p2_mana_width,
-            self.p2_mana_rect.height,
-            ),
-        )
-        
-        # Add health number for player2
-        health_text2 = self.log_window.font.render(f"Health: {self.player2.get_health()}", True, (255, 255, 255))
-        self.gui_surface.blit(health_text2, (226, 150))
-        
-        # Update log window on the GUI surface
-        self.log_window.update(self.gui_surface)
-
-        # Blit the GUI surface onto the right half of the main screen
-        self.screen.blit(self.gui_surface, (684, 0))
-        
-        p1_sprite = self.sprite_manager.get_sprite(self.player1.get_name(), self.player1_action)
-        p2_sprite = self.sprite_manager.get_sprite(self.player2.get_name(), self.player2_action)
-        
-        # if p1_sprite:
-        #     self.sprite_surface.blit(p1_sprite, (20, 20))
-        # if p2_sprite:
-        #     self.sprite_surface.blit(p2_sprite, (120, 20))
-            
-        # Play sounds based on actions
-        if self.player1_action in ['Attack', 'Heal', 'Special']:
-            self.sound_manager.play_sound(self.player1_action)
-            print('sound')
-        if self.player2_action in ['Attack', 'Heal', 'Special']:
-            self.sound_manager.play_sound(self.player2_action)
-
-    # Update the display
-        pygame.display.update()
-        logging.debug("GUI updated")
+        widgets = []
+        for index, (player, health_rect, mana_rect) in enumerate(
+            zip(self.players, self.health_rects, self.mana_rects)
+        ):
+            # The player's name above the health bar, the health bar with the
+            # health number next to it, and the mana bar.
+            row_width = self.gui_panel.surface.get_width() - health_rect.x
+            widgets.extend(
+                (
+                    panel.Widget(
+                        ("name", index),
+                        pygame.Rect(health_rect.x, health_rect.y - 25, row_width, 25),
+                        player.get_name(),
+                        (50, 50, 50),
+                        self._paint_name,
+                    ),
+                    panel.Widget(
+                        ("health", index),
+                        pygame.Rect(health_rect.x, health_rect.y, row_width, health_rect.height),
+                        player.get_health(),
+                        (50, 50, 50),
+                        self._paint_health,
+                    ),
+                    panel.Widget(
+                        ("mana", index),
+                        pygame.Rect(mana_rect.x, mana_rect.y, row_width, mana_rect.height),
+                        player.get_mana(),
+                        (50, 50, 50),
+                        self._paint_mana,
+                    ),
+                )
+            )
+        widgets.extend(self.log_window.widgets())
+        dirty_rects = self.gui_panel.draw(widgets)
+        if dirty_rects:
+            logging.debug("GUI updated")
+        return dirty_rects
+
+    def _paint_name(self, surface, rect, name):
+        name_surface = text_cache.render(self.log_window.font, name, (255, 255, 255))
+        surface.blit(name_surface, rect.topleft)
+
+    def _paint_health(self, surface, rect, health):
+        health_width = int((health / 100) * 200)
+        pygame.draw.rect(surface, (255, 0, 0), (rect.x, rect.y, health_width, rect.height))
+        health_text = text_cache.render(self.log_window.font, f"Health: {health}", (255, 255, 255))
+        surface.blit(health_text, (226, rect.y))
+
+    def _paint_mana(self, surface, rect, mana):
+        mana_width = int((mana / 100) * 200)
+        pygame.draw.rect(surface, (0, 0, 255), (rect.x, rect.y, mana_width, rect.height))
+
+    def update_display(self):
+        """Bring the camera view and GUI up to date and push only what changed to the screen."""
+        dirty_rects = self.update_camera_view() + self.update_gui()
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
 
     def log(self, message):
         """Add a message to the log window."""
         self.log_window.add_message(message)
         logging.info(message)
 
-    def process_round_moves(self, move1, move2):
+    def process_round_moves(self, moves):
         """
-        Process both players' moves concurrently.
-        move1: move chosen by player1 ("Attack", "Defending", "Resting", "Healing", "Special Attack")
-        move2: move chosen by player2 ("Attack", "Defending", "Resting", "Healing", "Special Attack")
+        Process every player's move for the turn with the combat rules.
+        moves: one move per player ("Attack", "Defending", "Resting", "Healing", "Special Attack").
+        Attacks hit the next player after the attacker who is still standing,
+        so in a two-player match each player targets the other.
         """
+        moves = [combat.normalize_move(move) for move in moves]
         logging.debug(
-            f"Processing moves: {self.player1.get_name()} -> {move1}, {self.player2.get_name()} -> {move2}"
+            "Processing moves: "
+            + ", ".join(
+                f"{player.get_name()} -> {move}" for player, move in zip(self.players, moves)
+            )
         )
-        # Process player1's move.
-        if move1 == "Attack":
-            pygame.display.update()
-            if self.player1.get_mana() >= 20:
-                self.player1.set_mana(self.player1.get_mana() - 20)
-                if move2 == "Defending":
-                    damage = self.player1.get_attack() - self.player2.get_defense()
-                    if damage < 0:
-                        damage = 0
-                    fully_efficient, reduction = calculate_defense_efficiency()
-                    if fully_efficient:
-                        damage = 0
-                        self.log(
-                            f"{self.player2.get_name()} defended fully against {self.player1.get_name()}'s attack!"
-                        )
-                    else:
-                        damage = int(damage * (1 - reduction))
-                        self.log(
-                            f"{self.player2.get_name()} defended inefficiently, reducing damage by {int(reduction * 100)}%!"
-                        )
-                elif move2 == "Resting":
-                    damage = int(self.player1.get_attack() * 1.5)
-                elif move2 == "Attacking":
-                    damage = self.player1.get_attack()
-                else:
-                    damage = self.player1.get_attack()
-                self.player2.set_health(self.player2.get_health() - damage)
-                self.log(
-                    f"{self.player1.get_name()} attacks {self.player2.get_name()} for {damage} damage!"
-                )
-            else:
-                self.log(
-                    f"{self.player1.get_name()} tried to attack but didn't have enough mana!"
-                )
-        elif move1 == "Defending":
-            if self.player1.get_mana() >= 20:
-                self.player1.set_mana(self.player1.get_mana() - 20)
-                self.log(f"{self.player1.get_name()} is defending this turn!")
-            else:
-                self.log(
-                    f"{self.player1.get_name()} tried to defend but didn't have enough mana!"
-                )
-        elif move1 == "Resting":
-            mana_gain = random.randint(20, 35)
-            self.player1.set_mana(self.player1.get_mana() + mana_gain)
-            self.log(f"{self.player1.get_name()} rests and gains {mana_gain} mana!")
-        elif move1 == "Healing":
-            if self.player1.get_mana() >= 30:
-                self.player1.set_mana(self.player1.get_mana() - 30)
-                health_gain = random.randint(15, 30)
-                self.player1.set_health(self.player1.get_health() + health_gain)
-                self.log(f"{self.player1.get_name()} heals and gains {health_gain} health!")
-            else:
-                self.log(
-                    f"{self.player1.get_name()} tried to heal but didn't have enough mana!"
-                )
-        elif move1 == "Special Attack":
-            if self.player1.get_mana() >= 50:
-                self.player1.set_mana(self.player1.get_mana() - 50)
-                damage = self.player1.get_attack() * 2
-                self.player2.set_health(self.player2.get_health() - damage)
-                self.log(
-                    f"{self.player1.get_name()} uses a special attack on {self.player2.get_name()} for {damage} damage!"
-                )
-            else:
-                self.log(
-                    f"{self.player1.get_name()} tried to use a special attack but didn't have enough mana!"
-                )
+        fighters = [combat.fighter(player) for player in self.players]
+        outcome = combat.resolve_turn(fighters, moves, rng=self.rng)
+        for player, state in zip(self.players, outcome.fighters):
+            player.set_health(state.health)
+            player.set_mana(state.mana)
+        names = [player.get_name() for player in self.players]
+        for event in outcome.events:
+            self.log(combat.describe(event, names))
 
-        # Process player2's move.
-        if move2 == "Attack":
-            
-            pygame.display.update()
-            if self.player2.get_mana() >= 20:
-                self.player2.set_mana(self.player2.get_mana() - 20)
-                if move1 == "Defending":
-                    damage = self.player2.get_attack() - self.player1.get_defense()
-                    if damage < 0:
-                        damage = 0
-                    fully_efficient, reduction = calculate_defense_efficiency()
-                    if fully_efficient:
-                        damage = 0
-                        self.log(
-                            f"{self.player1.get_name()} defended fully against {self.player2.get_name()}'s attack!"
-                        )
-                    else:
-                        damage = int(damage * (1 - reduction))
-                        self.log(
-                            f"{self.player1.get_name()} defended inefficiently, reducing damage by {int(reduction * 100)}%!"
-                        )
-                elif move1 == "Resting":
-                    damage = int(self.player2.get_attack() * 1.5)
-                elif move1 == "Attacking":
-                    damage = self.player2.get_attack()
-                else:
-                    damage = self.player2.get_attack()
-                self.player1.set_health(self.player1.get_health() - damage)
-                self.log(
-                    f"{self.player2.get_name()} attacks {self.player1.get_name()} for {damage} damage!"
-                )
-            else:
-                self.log(
-                    f"{self.player2.get_name()} tried to attack but didn't have enough mana!"
-                )
-        elif move2 == "Defending":
-            if self.player2.get_mana() >= 20:
-                self.player2.set_mana(self.player2.get_mana() - 20)
-                self.log(f"{self.player2.get_name()} is defending this turn!")
-            else:
-                self.log(
-                    f"{self.player2.get_name()} tried to defend but didn't have enough mana!"
-                )
-        elif move2 == "Resting":
-            mana_gain = random.randint(20, 35)
-            self.player2.set_mana(self.player2.get_mana() + mana_gain)
-            self.log(f"{self.player2.get_name()} rests and gains {mana_gain} mana!")
-        elif move2 == "Healing":
-            if self.player2.get_mana() >= 30:
-                self.player2.set_mana(self.player2.get_mana() - 30)
-                health_gain = random.randint(15, 30)
-                self.player2.set_health(self.player2.get_health() + health_gain)
-                self.log(f"{self.player2.get_name()} heals and gains {health_gain} health!")
-            else:
-                self.log(
-                    f"{self.player2.get_name()} tried to heal but didn't have enough mana!"
-                )
-        elif move2 == "Special Attack":
-            if self.player2.get_mana() >= 50:
-                self.player2.set_mana(self.player2.get_mana() - 50)
-                damage = self.player2.get_attack() * 2
-                self.player1.set_health(self.player1.get_health() - damage)
-                self.log(
-                    f"{self.player2.get_name()} uses a special attack on {self.player1.get_name()} for {damage} damage!"
-                )
-            else:
-                self.log(
-                    f"{self.player2.get_name()} tried to use a special attack but didn't have enough mana!"
-                )
-                
         if not hasattr(self, 'sound_manager'):
             self.sound_manager = sounds.SoundManager()
-    
+
         # Play sounds based on player actions
-        if move1 == "Attack":
-            self.sound_manager.play_sound('Attack')
-        elif move1 == "Healing":
-            self.sound_manager.play_sound('Heal')
-        elif move1 == "Special Attack":
-            self.sound_manager.play_sound('Special')
-            
-        # Same for player 2
-        if move2 == "Attack":
-            self.sound_manager.play_sound('Attack')
-        elif move2 == "Healing":
-            self.sound_manager.play_sound('Heal')
-        elif move2 == "Special Attack":
-            self.sound_manager.play_sound('Special')
+        for state, move in zip(fighters, moves):
+            if state.health <= 0:
+                continue
+            if move == "Attack":
+                self.sound_manager.play_sound('Attack')
+            elif move == "Healing":
+                self.sound_manager.play_sound('Heal')
+            elif move == "Special Attack":
+                self.sound_manager.play_sound('Special')
 
     def battle_round(self, single_player=False, bot=None):
         """
         Main battle loop.
-        For every TURN_TIME seconds, imaging.scan() is used to get both players' moves.
+        For every TURN_TIME seconds, imaging.scan() is used to get every player's move.
         The moves are processed, and both the camera view and GUI are updated.
         """
         logging.debug("Starting battle round")
         # Get moves from imaging.scan (blocks for TURN_TIME seconds).
-        moves = imaging.scan(TURN_TIME, single_player)
+        moves = imaging.scan(TURN_TIME, single_player, session=self.pose_session)
         logging.debug(f"Scanned moves: {moves}")
+        if self.pose_session.quit_requested:
+            logging.info("Game window closed by user during a turn")
+            self.running = False
+            return
+        turn = self.pose_session.last_turn
+        player_numbers = range(1, len(self.players) + 1)
+        confidences = " ".join(f"P{number}={turn.confidence[number]:.2f}" for number in player_numbers)
+        frame_counts = " ".join(f"P{number}={turn.frames[number]}" for number in player_numbers)
+        logging.info(
+            f"Turn resolved in {turn.elapsed:.2f}s (early: {turn.resolved_early}), "
+            f"confidence {confidences}, frames {frame_counts}"
+        )
+        logging.info(
+            "Vision pipeline latency this turn:\n"
+            + latency.format_report(self.pose_session.last_turn_latency)
+        )
         if not single_player:
-            move_p1, move_p2 = moves
-            self.player1_action = move_p1
-            self.player2_action = move_p2
+            moves = list(moves)
         else:
-            move_p1 = moves
-            self.player1_action = moves
             if bot is None:
                 logging.error("Bot is not defined in single player mode")
                 raise ValueError("Bot is not defined in single player mode")
-            move_p2 = ai.wizard_bot_turn(bot, self.player1)
+            moves = [moves, ai.wizard_bot_turn(bot, self.players[0], rng=self.rng)]
+        moves = [combat.normalize_move(move) for move in moves]
+        self.player_actions = moves
 
         self.log(
-            f"Moves this turn: {self.player1.get_name()} -> {move_p1}, {self.player2.get_name()} -> {move_p2}"
+            "Moves this turn: "
+            + ", ".join(
+                f"{player.get_name()} -> {move}" for player, move in zip(self.players, moves)
+            )
         )
 
-        self.process_round_moves(move_p1, move_p2)
+        self.process_round_moves(moves)
 
         # Update display: left half (camera) and right half (GUI).
-        self.update_camera_view()
-        self.update_gui()
-        pygame.display.update()
+        self.update_display()
         self.clock.tick(30)
+        cache = text_cache.CACHE
+        logging.debug(
+            f"Text cache this turn: hits={cache.hits}, misses={cache.misses}, entries={len(cache)}"
+        )
+        cache.reset_counters()
         logging.debug("Battle round completed")
 
     def declare_winner(self):
-        if self.player1.get_health() > self.player2.get_health():
-            self.log(f"{self.player1.get_name()} wins!")
-        elif self.player2.get_health() > self.player1.get_health():
-            self.log(f"{self.player2.get_name()} wins!")
+        best_health = max(player.get_health() for player in self.players)
+        leaders = [player for player in self.players if player.get_health() == best_health]
+        if len(leaders) == 1:
+            self.log(f"{leaders[0].get_name()} wins!")
         else:
             self.log("It's a draw!")
         logging.info("Game ended, winner declared")
-        # Keep the window open after the game ends until the user quits.
+        # No more turns: release the camera so it stops capturing (and
+        # recording read latencies); display_frame() keeps the last frame.
+        self.pose_session.stop()
+        # Keep the window open after the game ends until the user quits. Once
+        # the winner is on screen nothing changes, so each pass only checks
+        # for events and pushes no pixels.
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
                     logging.info("Game window closed by user")
                     return
-            self.update_camera_view()
-            self.update_gui()
-            pygame.display.update()
+            self.update_display()
             self.clock.tick(30)
 
     def gameOver(self):
-        if self.player1.get_health() <= 0 or self.player2.get_health() <= 0:
+        standing = sum(player.get_health() > 0 for player in self.players)
+        if standing <= 1:
             logging.debug("Game over condition met")
             return True
         return False
 
 
-def run():
+def run(seed=None):
+    """Play a match from properties.yaml; seed overrides game_options.seed."""
     # Load configuration from YAML.
     yaml_path = os.path.join(os.path.dirname(__file__), "../properties.yaml")
     with open(yaml_path, "r") as file:
         properties = yaml.safe_load(file)
     logging.debug("Configuration loaded from YAML")
 
-    player1_name = properties.get("game_options", {}).get("player1", {}).get("name")
-    player2_name = properties.get("game_options", {}).get("player2", {}).get("name")
-    if player1_name is None:
-        logging.error("player1 is not specified in properties.yaml")
-        raise ValueError("player1 is not specified in properties.yaml")
-    if player2_name is None:
-        logging.error("player2 is not specified in properties.yaml")
-        raise ValueError("player2 is not specified in properties.yaml")
+    game_options = properties.get("game_options", {})
+    num_players = game_options.get("num_players", 2)
+    player_names = []
+    for number in range(1, num_players + 1):
+        name = (game_options.get(f"player{number}") or {}).get("name")
+        if name is None:
+            logging.error(f"player{number} is not specified in properties.yaml")
+            raise ValueError(f"player{number} is not specified in properties.yaml")
+        player_names.append(name)
 
     single_player = properties.get("base_options", {}).get("mode") == "player_vs_ai"
+    if single_player and num_players != 2:
+        logging.error("player_vs_ai mode needs exactly two players")
+        raise ValueError("player_vs_ai mode needs exactly two players")
     bot = None
     if single_player:
         bot = ai.wizard_bot()
 
+    # Every random draw of the match comes from one seeded RNG, so the logged
+    # seed plus the players' moves reproduce the match.
+    if seed is None:
+        seed = game_options.get("seed")
+    seed, rng = combat.match_rng(seed)
+    logging.info(f"Match seed: {seed}")
+
     player_classes = {
         "Draco": Draco,
         "Hydra": Hydra,
@@ -521,24 +437,31 @@ def run():
         "Centaurus": Centaurus,
         "Cassiopeia": Cassiopeia,
     }
-    p1_class = player_classes.get(player1_name)
-    p2_class = player_classes.get(player2_name)
-    if p1_class is None:
-        logging.error(f"Unknown player1: {player1_name}")
-        raise ValueError(f"Unknown player1: {player1_name}")
-    if p2_class is None:
-        logging.error(f"Unknown player2: {player2_name}")
-        raise ValueError(f"Unknown player2: {player2_name}")
-
-    game = GameEngine(p1_class(), p2_class())
+    players = []
+    for number, name in enumerate(player_names, 1):
+        player_class = player_classes.get(name)
+        if player_class is None:
+            logging.error(f"Unknown player{number}: {name}")
+            raise ValueError(f"Unknown player{number}: {name}")
+        players.append(player_class(rng=rng))
+
+    game = GameEngine(*players, rng=rng)
     logging.info("GameEngine instance created")
-    while not game.gameOver():
-        game.battle_round(single_player=single_player, bot=bot)
-        pygame.time.wait(5000)
-        # ? Logic for pausing game and resuming to let user see stats
+    try:
+        while game.running and not game.gameOver():
+            game.battle_round(single_player=single_player, bot=bot)
+            if not game.running:
+                break
+            pygame.time.wait(5000)
+            # ? Logic for pausing game and resuming to let user see stats
 
-    game.declare_winner()
+        if game.running:
+            game.declare_winner()
+    finally:
+        game.shutdown()
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Play a match from properties.yaml")
+    parser.add_argument("--seed", type=int, default=None, help="seed to replay a match with")
+    run(seed=parser.parse_args().seed)
@@ -0,0 +1,111 @@
+import logging
+
+import cv2
+import numpy as np
+
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+"""Crop covering the whole frame, as normalized (x, y, width, height)"""
+
+
+def to_frame_coordinates(landmarks, crop):
+    """Map landmarks normalized to a crop back to full-frame normalized coordinates."""
+    x0, y0, width, height = crop
+    if crop == FULL_FRAME:
+        return landmarks
+    remapped = landmarks.copy()
+    # Exact zeros mark missing coordinates for the gesture rules; keep them.
+    remapped[..., 0] = np.where(landmarks[..., 0] == 0, 0, x0 + landmarks[..., 0] * width)
+    remapped[..., 1] = np.where(landmarks[..., 1] == 0, 0, y0 + landmarks[..., 1] * height)
+    # MediaPipe scales z like x.
+    remapped[..., 2] = landmarks[..., 2] * width
+    return remapped
+
+
+class InferenceFramer:
+    """Chooses what part of each frame the landmarker sees, and at what size.
+
+    Frames are downsampled so their long side is at most ``inference_width``.
+    Once every expected player has been found, later frames are cropped to a
+    padded box around the previous result's landmarks; if a player goes
+    missing it falls back to full-frame detection.
+    """
+
+    def __init__(
+        self,
+        inference_width=640,
+        roi_cropping=True,
+        roi_padding=0.25,
+        min_roi_size=0.3,
+        min_visibility=0.5,
+        expected_poses=2,
+    ):
+        self.inference_width = inference_width
+        self.roi_cropping = roi_cropping
+        self.roi_padding = roi_padding
+        self.min_roi_size = min_roi_size
+        self.min_visibility = min_visibility
+        self.expected_poses = expected_poses
+        self.roi = FULL_FRAME
+
+    def reset(self):
+        self.roi = FULL_FRAME
+
+    def prepare(self, frame):
+        """Return (inference_image, crop) for an RGB frame."""
+        frame_height, frame_width = frame.shape[:2]
+        x0, y0, width, height = self.roi
+        left = int(x0 * frame_width)
+        top = int(y0 * frame_height)
+        right = max(left + 1, int(round((x0 + width) * frame_width)))
+        bottom = max(top + 1, int(round((y0 + height) * frame_height)))
+        image = frame[top:bottom, left:right]
+        # Use the pixel-exact crop so landmarks map back precisely.
+        crop = (
+            left / frame_width,
+            top / frame_height,
+            (right - left) / frame_width,
+            (bottom - top) / frame_height,
+        )
+        if crop == (0.0, 0.0, 1.0, 1.0):
+            crop = FULL_FRAME
+
+        scale = self.inference_width / max(image.shape[:2])
+        if scale < 1:
+            size = (
+                max(1, int(image.shape[1] * scale)),
+                max(1, int(image.shape[0] * scale)),
+            )
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        else:
+            # MediaPipe needs contiguous memory.
+            image = np.ascontiguousarray(image)
+        return image, crop
+
+    def observe(self, landmarks):
+        """Update the region of interest from full-frame landmarks of the latest result."""
+        if not self.roi_cropping:
+            return
+        if len(landmarks) < self.expected_poses:
+            if self.roi != FULL_FRAME:
+                logging.debug("Lost a player, falling back to full-frame detection")
+            self.reset()
+            return
+
+        visible = landmarks[..., 3] >= self.min_visibility
+        if not visible.any():
+            self.reset()
+            return
+        points = landmarks[visible][:, :2]
+        low = np.clip(points.min(axis=0), 0.0, 1.0)
+        high = np.clip(points.max(axis=0), 0.0, 1.0)
+        size = np.maximum(high - low, self.min_roi_size)
+        center = (low + high) / 2
+        half = size * (1 + 2 * self.roi_padding) / 2
+        low = np.clip(center - half, 0.0, 1.0)
+        high = np.clip(center + half, 0.0, 1.0)
+        self.roi = (
+            float(low[0]),
+            float(low[1]),
+            float(high[0] - low[0]),
+            float(high[1] - low[1]),
+        )
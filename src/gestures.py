@@ -0,0 +1,225 @@
+import os
+import re
+import logging
+
+import numpy as np
+import yaml
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "../gestures.yaml")
+"""Default location of the gesture rule table"""
+
+LANDMARK_NAMES = (
+    "nose",
+    "left_eye_inner",
+    "left_eye",
+    "left_eye_outer",
+    "right_eye_inner",
+    "right_eye",
+    "right_eye_outer",
+    "left_ear",
+    "right_ear",
+    "mouth_left",
+    "mouth_right",
+    "left_shoulder",
+    "right_shoulder",
+    "left_elbow",
+    "right_elbow",
+    "left_wrist",
+    "right_wrist",
+    "left_pinky",
+    "right_pinky",
+    "left_index",
+    "right_index",
+    "left_thumb",
+    "right_thumb",
+    "left_hip",
+    "right_hip",
+    "left_knee",
+    "right_knee",
+    "left_ankle",
+    "right_ankle",
+    "left_heel",
+    "right_heel",
+    "left_foot_index",
+    "right_foot_index",
+)
+"""MediaPipe pose landmark names, in landmark index order"""
+LANDMARK_INDEX = {name: index for index, name in enumerate(LANDMARK_NAMES)}
+AXES = {"x": 0, "y": 1, "z": 2}
+VISIBILITY = 3
+
+LEFT_SHOULDER = LANDMARK_INDEX["left_shoulder"]
+RIGHT_SHOULDER = LANDMARK_INDEX["right_shoulder"]
+LEFT_HIP = LANDMARK_INDEX["left_hip"]
+RIGHT_HIP = LANDMARK_INDEX["right_hip"]
+BODY_LANDMARKS = (RIGHT_SHOULDER, LEFT_SHOULDER, RIGHT_HIP, LEFT_HIP)
+"""Landmarks every rule depends on through center.x and the torso length"""
+
+_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+_POINT = r"([a-z_]+)\.([xyz])"
+_CONDITION = re.compile(
+    r"^(\|)?\s*" + _POINT + r"\s*(?:-\s*" + _POINT + r")?\s*(\|)?"
+    r"\s*(<=|>=|<|>)\s*(-)?\s*([a-z_]+|\d+(?:\.\d*)?|\.\d+)$"
+)
+
+
+def body_frame(landmarks):
+    """Return (center_x, torso_length) for landmarks of shape (..., 33, 4).
+
+    A shoulder or hip at exactly 0 is treated as missing and the other side
+    is used on its own.
+    """
+    right_shoulder = landmarks[..., RIGHT_SHOULDER, :]
+    left_shoulder = landmarks[..., LEFT_SHOULDER, :]
+    right_hip = landmarks[..., RIGHT_HIP, :]
+    left_hip = landmarks[..., LEFT_HIP, :]
+
+    center_x = np.where(
+        right_shoulder[..., 0] == 0,
+        left_shoulder[..., 0],
+        np.where(
+            left_shoulder[..., 0] == 0,
+            right_shoulder[..., 0],
+            (right_shoulder[..., 0] + left_shoulder[..., 0]) / 2,
+        ),
+    )
+
+    right_torso = np.abs(right_hip[..., 1] - right_shoulder[..., 1])
+    left_torso = np.abs(left_hip[..., 1] - left_shoulder[..., 1])
+    torso_length = np.where(
+        right_hip[..., 1] == 0,
+        left_torso,
+        np.where(left_hip[..., 1] == 0, right_torso, (right_torso + left_torso) / 2),
+    )
+    return center_x, torso_length
+
+
+class GestureRules:
+    """A compiled gesture table that classifies batches of poses."""
+
+    def __init__(self, moves, default_code, gestures, required_landmarks):
+        self.moves = list(moves)
+        self.default_code = default_code
+        self.gestures = gestures
+        """(move_code, predicate) pairs in priority order"""
+        self.required_landmarks = required_landmarks
+
+    def classify(self, landmarks):
+        """Move codes for landmarks of shape (..., 33, 4), e.g. (frames, poses, 33, 4)."""
+        landmarks = np.asarray(landmarks)
+        center_x, torso_length = body_frame(landmarks)
+        codes = np.select(
+            [predicate(landmarks, center_x, torso_length) for _, predicate in self.gestures],
+            [code for code, _ in self.gestures],
+            default=self.default_code,
+        )
+        missing = np.any(
+            landmarks[..., self.required_landmarks, VISIBILITY] == 0, axis=-1
+        )
+        return np.where(missing, self.default_code, codes)
+
+
+def _point(name, axis, required):
+    if name == "center":
+        if axis != "x":
+            raise ValueError(f"center only has an x coordinate, got center.{axis}")
+        return lambda landmarks, center_x: center_x
+    if name not in LANDMARK_INDEX:
+        raise ValueError(f"Unknown landmark '{name}' in gesture rules")
+    index = LANDMARK_INDEX[name]
+    required.add(index)
+    axis_index = AXES[axis]
+    return lambda landmarks, center_x: landmarks[..., index, axis_index]
+
+
+def _compile_condition(text, constants, required):
+    match = _CONDITION.match(text.strip())
+    if match is None:
+        raise ValueError(f"Could not parse gesture condition '{text}'")
+    (open_bar, name_a, axis_a, name_b, axis_b, close_bar, op, negate, threshold) = (
+        match.groups()
+    )
+    if bool(open_bar) != bool(close_bar):
+        raise ValueError(f"Unbalanced |...| in gesture condition '{text}'")
+
+    if threshold in constants:
+        factor = float(constants[threshold])
+    else:
+        try:
+            factor = float(threshold)
+        except ValueError:
+            raise ValueError(
+                f"Unknown constant '{threshold}' in gesture condition '{text}'"
+            ) from None
+    if negate:
+        factor = -factor
+
+    lhs = _point(name_a, axis_a, required)
+    rhs = _point(name_b, axis_b, required) if name_b else None
+    compare = _OPERATORS[op]
+
+    def predicate(landmarks, center_x, torso_length):
+        value = lhs(landmarks, center_x)
+        if rhs is not None:
+            value = value - rhs(landmarks, center_x)
+        if open_bar:
+            value = np.abs(value)
+        return compare(value, factor * torso_length)
+
+    return predicate
+
+
+def _compile_clause(clause, constants, required):
+    if isinstance(clause, str):
+        return _compile_condition(clause, constants, required)
+    if not isinstance(clause, dict) or len(clause) != 1:
+        raise ValueError(f"Expected a condition or a single any/all block, got {clause!r}")
+
+    (kind, children), = clause.items()
+    if kind not in ("any", "all") or not isinstance(children, list) or not children:
+        raise ValueError(f"Expected a non-empty any/all list, got {clause!r}")
+    predicates = [_compile_clause(child, constants, required) for child in children]
+    combine = np.logical_or if kind == "any" else np.logical_and
+
+    def predicate(landmarks, center_x, torso_length):
+        mask = predicates[0](landmarks, center_x, torso_length)
+        for child in predicates[1:]:
+            mask = combine(mask, child(landmarks, center_x, torso_length))
+        return mask
+
+    return predicate
+
+
+def compile_rules(spec, moves):
+    """Compile a parsed rule table into GestureRules over the given move names."""
+    constants = spec.get("constants", {}) or {}
+    default = spec.get("default", moves[0])
+    if default not in moves:
+        raise ValueError(f"Unknown default move '{default}' in gesture rules")
+
+    required = set(BODY_LANDMARKS)
+    gestures = []
+    for gesture in spec.get("gestures", []) or []:
+        move = gesture.get("move")
+        if move not in moves:
+            raise ValueError(f"Unknown move '{move}' in gesture rules")
+        clause = {key: value for key, value in gesture.items() if key != "move"}
+        gestures.append(
+            (moves.index(move), _compile_clause(clause, constants, required))
+        )
+
+    return GestureRules(moves, moves.index(default), gestures, sorted(required))
+
+
+def load_rules(moves, path=RULES_PATH):
+    """Load and compile the gesture rule table at ``path``."""
+    with open(path, "r") as file:
+        spec = yaml.safe_load(file) or {}
+    rules = compile_rules(spec, moves)
+    logging.debug(f"Loaded {len(rules.gestures)} gesture rules from {path}")
+    return rules
@@ -3,9 +3,29 @@ import pygame
 import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
-from mediapipe.framework.formats import landmark_pb2
 import numpy as np
+import asyncio
 import threading
+import logging
+import os
+import time
+import yaml
+
+import framing
+import gestures
+import latency
+import overlay
+import tracking
+import pose_worker
+import landmark_trace
+import presenter
+import result_channel
+import voting
+import capture
+from capture import FrameGrabber
+from combat import MOVES, RESTING
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 WIDTH, HEIGHT = 1920, 1080
 """Width and height of the Pygame screen"""
@@ -15,17 +35,47 @@ MIN_TRACKING_CONFIDENCE = 0.8
 """Confidence level required to establish pose tracking"""
 MIN_PRESENCE_CONFIDENCE = 0.7
 """Confidence level required to establish a pose presence"""
-TORSO_LENGTH_ARM_RATIO = 0.35
-"""Ratio of the torso length to the arm length"""
 SOLO_PLAY = False
 """Whether the player is playing alone"""
 NUM_POSES = 2
-"""Number of poses to detect"""
-MODEL_PATH_ALT = "/Users/ankur/Coding-Projects/Hackathon/SpartahackX/SpartaX/src/pose_landmarker_full.task"
-MODEL_PATH = "/Users/ammar/Desktop/ec/hackathons/spartahackX_good/SpartaX/src/pose_landmarker_full.task"
-
-# MODEL_PATH = "./src/pose_landmarker_full.task"
-"""Path to the pose landmarker model"""
+"""Default number of players, and so of poses to detect"""
+MODEL_VARIANTS = ["lite", "full", "heavy"]
+"""Pose landmarker model variants, from fastest to most accurate"""
+PROPERTIES_PATH = os.path.join(os.path.dirname(__file__), "../properties.yaml")
+DEFAULT_VISION_OPTIONS = {
+    "source": 0,
+    "capture_width": 1280,
+    "capture_height": 720,
+    "capture_fps": 30,
+    "capture_formats": ["MJPG", "YUYV"],
+    "model": "full",
+    "model_dir": "src",
+    "latency_budget_ms": 33,
+    "output_segmentation_masks": False,
+    "min_detection_confidence": MIN_DETECTION_CONFIDENCE,
+    "min_presence_confidence": MIN_PRESENCE_CONFIDENCE,
+    "min_tracking_confidence": MIN_TRACKING_CONFIDENCE,
+    "inference_width": 640,
+    "roi_cropping": True,
+    "roi_padding": 0.25,
+    "early_resolution": True,
+    "confidence_threshold": 0.8,
+    "min_turn_frames": 15,
+    "stable_frames": 10,
+    "vote_hysteresis": 0.1,
+    "trace_dir": None,
+    "inference_workers": 0,
+    "worker_timeout_s": 5.0,
+    "keyframe_interval": 1,
+    "tracking_max_error_px": 2.0,
+    "tracking_max_motion": 0.05,
+    "tracking_width": 480,
+    "inference_fps": 0,
+    "display_fps": 30,
+    "num_players": NUM_POSES,
+    "player_zones": None,
+}
+"""Defaults for the vision_options section of properties.yaml"""
 
 # pygame.init()
 # cap = cv2.VideoCapture(0)
@@ -34,325 +84,869 @@ MODEL_PATH = "/Users/ammar/Desktop/ec/hackathons/spartahackX_good/SpartaX/src/po
 # screen = pygame.display.set_mode((WIDTH, HEIGHT))
 # pygame.display.set_caption("WizViz Pose Detection")
 
-to_window = None
-last_timestamp_ms = 0
-detection_result = None
+NUM_LANDMARKS = 33
+"""Number of landmarks in a MediaPipe pose"""
+GESTURE_RULES = gestures.load_rules(MOVES)
+"""Gesture rules compiled from gestures.yaml at startup"""
 
+NOSE = gestures.LANDMARK_INDEX["nose"]
+X, Y, Z, VISIBILITY = range(4)
 
-def print_result(
-    result: vision.PoseLandmarkerResult,  # type: ignore
-    output_image: mp.Image,
-    timestamp_ms: int,
-):
-    global to_window
-    global last_timestamp_ms
-    global detection_result
-    if timestamp_ms < last_timestamp_ms:
-        return
-    last_timestamp_ms = timestamp_ms
-    detection_result = result
-    to_window = cv2.cvtColor(
-        draw_landmarks_on_image(output_image.numpy_view(), detection_result),
-        cv2.COLOR_RGB2BGR,
-    )
 
+def player_zones(num_players, zones=None):
+    """(num_players, 2) array of [x_min, x_max) nose x ranges, one row per player.
 
-def get_player_number(pose_landmarks):
-    nose_pose_x = pose_landmarks[mp.solutions.pose.PoseLandmark.NOSE].x
-    player_number = 0
+    Without explicit ``zones`` the frame is split into equal vertical strips,
+    with the outer edges open so poses near the border still count.
+    """
+    if zones is None:
+        edges = np.linspace(0, 1, num_players + 1)
+        edges[0], edges[-1] = -np.inf, np.inf
+        return np.stack([edges[:-1], edges[1:]], axis=1)
+    zones = np.asarray(zones, dtype=np.float64)
+    if (
+        zones.shape != (num_players, 2)
+        or np.any(zones[:, 1] <= zones[:, 0])
+        or np.any(zones[1:, 0] < zones[:-1, 1])
+    ):
+        raise ValueError(
+            f"player_zones must list {num_players} non-overlapping [x_min, x_max] ranges, left to right"
+        )
+    return zones
 
-    if nose_pose_x == 0:
-        return 0
 
-    if SOLO_PLAY:
-        return 1
+PLAYER_ZONES = player_zones(NUM_POSES)
+"""Nose x ranges used to assign poses to players; PoseSession sets them from properties.yaml"""
 
-    if nose_pose_x < 0.5:
-        player_number = 1
-    else:
-        player_number = 2
 
-    return player_number
+def publish_result(channel, result, rgb_frame, timestamp_ms, landmarks):
+    """Classify full-frame ``landmarks`` and publish them to ``channel`` with the raw frame.
 
+    Nothing is drawn here; the skeleton is rendered when a frame is actually
+    displayed. Returns False if the result was older than the last one
+    published and got dropped.
+    """
+    actions = classify_poses(landmarks) + (pose_weights(landmarks),)
+    return channel.publish(timestamp_ms, rgb_frame, landmarks, actions, result)
 
-def define_action(pose_landmarks):
-    right_wrist = pose_landmarks[mp.solutions.pose.PoseLandmark.RIGHT_WRIST]
-    left_wrist = pose_landmarks[mp.solutions.pose.PoseLandmark.LEFT_WRIST]
 
-    right_shoulder = pose_landmarks[mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER]
-    left_shoulder = pose_landmarks[mp.solutions.pose.PoseLandmark.LEFT_SHOULDER]
+def landmarks_to_array(pose_landmarks_list):
+    """Convert a result's pose_landmarks into a (num_poses, 33, 4) float32 array."""
+    landmarks = np.zeros((len(pose_landmarks_list), NUM_LANDMARKS, 4), dtype=np.float32)
+    for pose_index, pose_landmarks in enumerate(pose_landmarks_list):
+        landmarks[pose_index] = [
+            (landmark.x, landmark.y, landmark.z, landmark.visibility)
+            for landmark in pose_landmarks
+        ]
+    return landmarks
 
-    right_hip = pose_landmarks[mp.solutions.pose.PoseLandmark.RIGHT_HIP]
-    left_hip = pose_landmarks[mp.solutions.pose.PoseLandmark.LEFT_HIP]
 
-    if right_shoulder.x == 0:
-        human_center_x = left_shoulder.x
-    elif left_shoulder.x == 0:
-        human_center_x = right_shoulder.x
-    else:
-        human_center_x = np.average([right_shoulder.x, left_shoulder.x])
+def get_player_numbers(landmarks, solo_play=None, zones=None):
+    """Player id (0 = unassigned, 1..num_players) for every pose in ``landmarks``.
 
-    if right_hip.y == 0:
-        torso_length = np.abs(left_hip.y - left_shoulder.y)
-    elif left_hip.y == 0:
-        torso_length = np.abs(right_hip.y - right_shoulder.y)
+    A pose belongs to the player whose zone (see player_zones) contains its
+    nose; poses outside every zone are unassigned.
+    """
+    if solo_play is None:
+        solo_play = SOLO_PLAY
+    if zones is None:
+        zones = PLAYER_ZONES
+    nose_x = landmarks[..., NOSE, X]
+    if solo_play:
+        player_numbers = np.ones(nose_x.shape, dtype=np.int64)
     else:
-        torso_length = np.average(
-            [
-                np.abs(right_hip.y - right_shoulder.y),
-                np.abs(left_hip.y - left_shoulder.y),
-            ]
-        )
+        zone = np.searchsorted(zones[:, 0], nose_x, side="right") - 1
+        clipped = np.clip(zone, 0, len(zones) - 1)
+        inside = (zone >= 0) & (nose_x < zones[clipped, 1])
+        player_numbers = np.where(inside, clipped + 1, 0)
+    return np.where(nose_x == 0, 0, player_numbers)
 
-    player_number = get_player_number(pose_landmarks)
-    player_move = "Resting"
-    
-    # print(f"Right wrist visibility: {right_wrist.visibility}")
-    # print(f"Left wrist visibility: {left_wrist.visibility}")
-    # print(f"Right shoulder visibility: {right_shoulder.visibility}")
-    # print(f"Left shoulder visibility: {left_shoulder.visibility}")
-    # print(f"Right hip visibility: {right_hip.visibility}")
-    # print(f"Left hip visibility: {left_hip.visibility}")
-    
-    if (
-        right_wrist.visibility == 0
-        or left_wrist.visibility == 0
-        or right_shoulder.visibility == 0
-        or left_shoulder.visibility == 0
-        or right_hip.visibility == 0
-        or left_hip.visibility == 0
-    ):
-        return tuple([player_number, player_move])
 
-    if (
-        abs(right_wrist.x - human_center_x) > TORSO_LENGTH_ARM_RATIO * torso_length
-        or abs(left_wrist.x - human_center_x) > TORSO_LENGTH_ARM_RATIO * torso_length
-    ):
-        
-        player_move = "Attack"
-        
-        if (
-            right_wrist.y < (right_hip.y - (TORSO_LENGTH_ARM_RATIO * torso_length))
-            and abs(left_wrist.x - human_center_x) > TORSO_LENGTH_ARM_RATIO * torso_length
-        ) or (
-            left_wrist.y < (left_hip.y - (TORSO_LENGTH_ARM_RATIO * torso_length))
-            and abs(right_wrist.x - human_center_x) > TORSO_LENGTH_ARM_RATIO * torso_length
-        ):
-            player_move = "Special Attack"
-
-    elif (
-        right_wrist.y < (right_hip.y - (0.2 * torso_length))
-        and right_wrist.y > right_shoulder.y
-    ) or (
-        left_wrist.y < (left_hip.y - (0.2 * torso_length))
-        and left_wrist.y > left_shoulder.y
-    ):
-        player_move = "Defending"
+def get_player_number(pose_landmarks):
+    return int(get_player_numbers(landmarks_to_array([pose_landmarks]))[0])
 
-    elif right_wrist.y < (right_shoulder.y + 0.15 * torso_length) or left_wrist.y < (
-        left_shoulder.y + 0.15 * torso_length
-    ):
-        player_move = "Healing"
-    print(tuple([player_number, player_move]))
-    return tuple([player_number, player_move])
 
+def classify_poses(landmarks, solo_play=None, zones=None):
+    """Classify every pose in ``landmarks`` in one vectorized pass.
 
-options = vision.PoseLandmarkerOptions(
-    base_options=python.BaseOptions(model_asset_path=MODEL_PATH),
+    ``landmarks`` has shape (..., 33, 4); returns (player_ids, move_codes) with
+    the leading shape, move codes indexing MOVES.
+    """
+    return (
+        get_player_numbers(landmarks, solo_play, zones),
+        GESTURE_RULES.classify(landmarks),
+    )
+
+
+def pose_weights(landmarks):
+    """Vote weight of each pose: mean visibility of the landmarks the gesture rules use."""
+    return landmarks[..., GESTURE_RULES.required_landmarks, VISIBILITY].mean(axis=-1)
+
+
+def define_action(pose_landmarks):
+    player_numbers, moves = classify_poses(landmarks_to_array([pose_landmarks]))
+    return tuple([int(player_numbers[0]), MOVES[moves[0]]])
+
+
+def load_properties():
+    try:
+        with open(PROPERTIES_PATH, "r") as file:
+            return yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        logging.warning("properties.yaml not found, using default options")
+        return {}
+
+
+def load_vision_options(properties=None):
+    """Read vision_options from properties.yaml, filling in defaults."""
+    if properties is None:
+        properties = load_properties()
+    vision_options = dict(DEFAULT_VISION_OPTIONS)
+    vision_options.update(properties.get("vision_options", {}) or {})
+    return vision_options
+
+
+def model_path(variant, model_dir="src"):
+    """Path of the .task file for a model variant; model_dir is relative to the repo root."""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(
+            f"Unknown pose landmarker model '{variant}', expected one of {MODEL_VARIANTS} or 'auto'"
+        )
+    return os.path.join(
+        os.path.dirname(__file__), "..", model_dir, f"pose_landmarker_{variant}.task"
+    )
+
+
+def landmarker_options(
+    vision_options,
+    variant,
     running_mode=vision.RunningMode.LIVE_STREAM,
-    num_poses=NUM_POSES,
-    min_pose_detection_confidence=MIN_DETECTION_CONFIDENCE,
-    min_pose_presence_confidence=MIN_PRESENCE_CONFIDENCE,
-    min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
-    output_segmentation_masks=True,
-    result_callback=print_result,
-)
-
-
-def draw_landmarks_on_image(rgb_image, detection_result):
-    if (rgb_image is None) or (detection_result is None):
-        return
-
-    pose_object_list = detection_result.pose_landmarks
-    annotated_image = rgb_image.copy()
-
-    # Loop through the detected poses to visualize.
-    for idx in range(len(pose_object_list)):
-        pose_landmarks = pose_object_list[idx]
-
-        pose_landmarks_proto = landmark_pb2.NormalizedLandmarkList()
-        pose_landmarks_proto.landmark.extend(
-            [
-                landmark_pb2.NormalizedLandmark(
-                    x=landmark.x, y=landmark.y, z=landmark.z
-                )
-                for landmark in pose_landmarks
-            ]
+    result_callback=None,
+):
+    """PoseLandmarkerOptions from vision_options; LIVE_STREAM needs a result_callback."""
+    if running_mode == vision.RunningMode.LIVE_STREAM and result_callback is None:
+        raise ValueError("A LIVE_STREAM landmarker needs a result_callback")
+    return vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(
+            model_asset_path=model_path(variant, vision_options["model_dir"])
+        ),
+        running_mode=running_mode,
+        num_poses=vision_options["num_players"],
+        min_pose_detection_confidence=vision_options["min_detection_confidence"],
+        min_pose_presence_confidence=vision_options["min_presence_confidence"],
+        min_tracking_confidence=vision_options["min_tracking_confidence"],
+        output_segmentation_masks=vision_options["output_segmentation_masks"],
+        result_callback=(
+            result_callback if running_mode == vision.RunningMode.LIVE_STREAM else None
+        ),
+    )
+
+
+def benchmark_model(vision_options, variant, sample_frames):
+    """Median per-frame detection time in ms for a model variant on RGB sample frames."""
+    timings = []
+    image_options = landmarker_options(
+        vision_options, variant, running_mode=vision.RunningMode.IMAGE
+    )
+    with vision.PoseLandmarker.create_from_options(image_options) as landmarker:
+        images = [
+            mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+            for frame in sample_frames
+        ]
+        # The first call includes one-off graph setup, so leave it out.
+        landmarker.detect(images[0])
+        for image in images:
+            start = time.perf_counter()
+            landmarker.detect(image)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def select_model_variant(vision_options, sample_frames):
+    """Resolve the configured model variant, benchmarking the candidates in auto mode.
+
+    Auto mode picks the most accurate installed variant whose median latency
+    fits latency_budget_ms, falling back to the fastest installed one.
+    """
+    variant = vision_options["model"]
+    if variant != "auto":
+        model_path(variant)  # Validate the name early.
+        return variant
+
+    installed = [
+        candidate
+        for candidate in MODEL_VARIANTS
+        if os.path.exists(model_path(candidate, vision_options["model_dir"]))
+    ]
+    if not installed:
+        raise FileNotFoundError(
+            f"No pose landmarker models found in {vision_options['model_dir']}"
         )
-        mp.solutions.drawing_utils.draw_landmarks(
-            annotated_image,
-            pose_landmarks_proto,
-            mp.solutions.pose.POSE_CONNECTIONS,
-            mp.solutions.drawing_styles.get_default_pose_landmarks_style(),
+    if not sample_frames:
+        logging.warning("No frames to benchmark models with, using the fastest one")
+        return installed[0]
+
+    budget_ms = vision_options["latency_budget_ms"]
+    for candidate in reversed(installed):
+        latency_ms = benchmark_model(vision_options, candidate, sample_frames)
+        logging.info(f"Pose landmarker '{candidate}' median latency: {latency_ms:.1f} ms")
+        if latency_ms <= budget_ms:
+            return candidate
+    return installed[0]
+
+
+class PoseSession:
+    """Long-lived camera capture and PoseLandmarker shared by every turn of a match.
+
+    Opening the camera and building the landmarker is expensive, so the engine
+    starts one session when the match begins and stops it on quit; each turn
+    then only collects votes for a few seconds on top of it.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        width=None,
+        height=None,
+        warmup_frames=5,
+        frame_presenter=None,
+        num_players=None,
+    ):
+        self.source_spec = source
+        """Camera index, video file, image directory or .npz; vision_options.source if None"""
+        self.num_players = num_players
+        """Players (and poses) to track; vision_options.num_players if None"""
+        self.frame_presenter = frame_presenter
+        """FramePresenter used to show the camera during scans; sized to the screen if None"""
+        self.warmup_frames = warmup_frames
+        self.width = width
+        self.height = height
+        """Capture resolution; vision_options.capture_width/capture_height if None"""
+        self.source = None
+        self.grabber = None
+        self.landmarker = None
+        self.inference_pool = None
+        """pose_worker.InferencePool when vision_options.inference_workers > 0"""
+        self.vision_options = None
+        self.model_variant = None
+        self.framer = None
+        self.tracker = None
+        """tracking.KeyframeTracker when vision_options.keyframe_interval > 1"""
+        self.overlay = None
+        self.last_turn = None
+        """voting.TurnResult of the most recent scan"""
+        self.results = result_channel.ResultChannel()
+        """Landmarks, votes and display frame of the newest result"""
+        self.latency = latency.LatencyRecorder()
+        """Per-stage timings of the current turn; reset when a scan starts"""
+        self.last_turn_latency = None
+        """latency.LatencyReport of the most recent scan"""
+        self._camera_frame = None
+        """(timestamp_ms, bgr_frame, rgb_frame or None) of the newest grabbed frame"""
+        self._last_inference = 0.0
+        self._displayed_key = None
+        self._displayed = None
+        self._display_buffer = None
+        self._pending = OrderedDict()
+        """timestamp_ms -> (rgb_frame, crop, tracking_gray, captured_at) for frames queued on the landmarker"""
+        self._pending_lock = threading.Lock()
+        self.trace_writer = None
+        """landmark_trace.TraceWriter for the current turn when vision_options.trace_dir is set"""
+        self._trace_lock = threading.Lock()
+        self._capture_executor = None
+        """Single thread that grabs frames and submits them during scans"""
+        self.quit_requested = False
+
+    @property
+    def running(self):
+        return self.source is not None and (
+            self.landmarker is not None or self.inference_pool is not None
         )
 
-        if True:  # ! Disable for production
-            nose_pose = pose_landmarks[mp.solutions.pose.PoseLandmark.NOSE]
-            action = define_action(pose_landmarks)
-
-            cv2.putText(
-                annotated_image,
-                f"Player {action[0]}: {action[1]}",
-                (
-                    int(nose_pose.x * WIDTH),
-                    int(nose_pose.y * HEIGHT),
-                ),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2,
-                cv2.LINE_AA,
+    @property
+    def displayed_key(self):
+        """(timestamp_ms, result sequence) of the frame display_frame last returned.
+
+        Changes exactly when display_frame has a different picture to show, so
+        callers can skip presenting a frame that is already on screen.
+        """
+        return self._displayed_key
+
+    def start(self):
+        """Open the frame source and create the landmarker. Safe to call twice."""
+        global PLAYER_ZONES
+
+        if self.running:
+            return
+        properties = load_properties()
+        base_options = properties.get("base_options", {}) or {}
+        self.vision_options = load_vision_options(properties)
+        if self.num_players is None:
+            self.num_players = self.vision_options["num_players"]
+        self.vision_options["num_players"] = self.num_players
+        PLAYER_ZONES = player_zones(self.num_players, self.vision_options["player_zones"])
+
+        spec = self.source_spec
+        if spec is None:
+            spec = self.vision_options["source"]
+        self.source = capture.open_source(
+            spec,
+            self.width or self.vision_options["capture_width"],
+            self.height or self.vision_options["capture_height"],
+            fps=self.vision_options["capture_fps"],
+            formats=self.vision_options["capture_formats"],
+        )
+        if not self.source.isOpened():
+            self.source.release()
+            self.source = None
+            raise RuntimeError(f"Could not open frame source {spec}")
+        self.grabber = FrameGrabber(
+            self.source, lossless=not self.source.realtime, latency=self.latency
+        )
+        self.grabber.start()
+        self.overlay = overlay.SkeletonOverlay(
+            enabled=base_options.get("skeleton", True),
+            show_labels=base_options.get("debug_mode", False),
+        )
+        self.framer = framing.InferenceFramer(
+            inference_width=self.vision_options["inference_width"],
+            roi_cropping=self.vision_options["roi_cropping"],
+            roi_padding=self.vision_options["roi_padding"],
+            expected_poses=self.num_players,
+        )
+        if self.vision_options["keyframe_interval"] > 1:
+            self.tracker = tracking.KeyframeTracker(
+                GESTURE_RULES.required_landmarks,
+                keyframe_interval=self.vision_options["keyframe_interval"],
+                max_error=self.vision_options["tracking_max_error_px"],
+                max_motion=self.vision_options["tracking_max_motion"],
+                tracking_width=self.vision_options["tracking_width"],
             )
-
-            left_wrist = pose_landmarks[mp.solutions.pose.PoseLandmark.LEFT_WRIST]
-            right_wrist = pose_landmarks[mp.solutions.pose.PoseLandmark.RIGHT_WRIST]
-
-            if left_wrist.visibility > MIN_TRACKING_CONFIDENCE:
-                cv2.putText(
-                    annotated_image,
-                    "Left wrist",
-                    (
-                        int(left_wrist.x * WIDTH),
-                        int(left_wrist.y * HEIGHT),
-                    ),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 255, 0),
-                    2,
-                    cv2.LINE_AA,
+        sample_frames = self._sample_frames() if self.vision_options["model"] == "auto" else []
+        self.model_variant = select_model_variant(self.vision_options, sample_frames)
+        logging.info(f"Using pose landmarker model '{self.model_variant}'")
+        if self.vision_options["inference_workers"] > 0:
+            self.inference_pool = pose_worker.InferencePool(
+                self.vision_options,
+                self.model_variant,
+                num_workers=self.vision_options["inference_workers"],
+                max_side=self.vision_options["inference_width"],
+                timeout=self.vision_options["worker_timeout_s"],
+            )
+            self.inference_pool.start()
+        else:
+            self.landmarker = vision.PoseLandmarker.create_from_options(
+                landmarker_options(
+                    self.vision_options, self.model_variant, result_callback=self._on_result
                 )
+            )
+        self._capture_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="PoseCapture"
+        )
+        self.quit_requested = False
+        # Push a few frames through so the first turn doesn't start on a cold model.
+        for _ in range(self.warmup_frames):
+            if not self._detect_next_frame():
+                break
+            self._poll_workers()
+        logging.info("Pose session started")
+
+    def stop(self):
+        """Release the frame source and close the landmarker."""
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
+        if self._capture_executor is not None:
+            # Lets a capture step cut off by the end of a turn finish first.
+            self._capture_executor.shutdown(wait=True)
+            self._capture_executor = None
+        if self.source is not None:
+            self.source.release()
+            self.source = None
+        if self.landmarker is not None:
+            self.landmarker.close()
+            self.landmarker = None
+        if self.inference_pool is not None:
+            self.inference_pool.stop()
+            self.inference_pool = None
+        with self._pending_lock:
+            self._pending.clear()
+        self._close_trace()
+        logging.info("Pose session stopped")
+
+    def _sample_frames(self, count=10):
+        """Grab a few RGB frames to benchmark model variants on."""
+        frames = []
+        for _ in range(count):
+            grabbed = self.grabber.wait_for_frame()
+            if grabbed is None:
+                break
+            rgb_frame = cv2.cvtColor(grabbed[2], cv2.COLOR_BGR2RGB)
+            frames.append(self.framer.prepare(rgb_frame)[0])
+        return frames
+
+    def _detect_next_frame(self):
+        """Queue the freshest grabbed frame on the landmarker."""
+        grabbed = self.grabber.wait_for_frame()
+        if grabbed is None:
+            return False
+        _, timestamp_ms, frame, captured_at = grabbed
+        self._camera_frame = (timestamp_ms, frame, None)
+
+        inference_fps = self.vision_options["inference_fps"]
+        if inference_fps > 0:
+            now = time.perf_counter()
+            if now - self._last_inference < 1 / inference_fps:
+                # Still shown by display_frame(), just not run through inference.
+                self.latency.count("throttled")
+                return True
+            self._last_inference = now
+
+        convert_started = time.perf_counter()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self._camera_frame = (timestamp_ms, frame, rgb_frame)
+        gray = None
+        if self.tracker is not None:
+            if self.tracker.detection_in_flight():
+                # Shown, but wait for the keyframe before tracking on from it.
+                self.latency.record_since("convert", convert_started)
+                self.latency.count("held")
+                return True
+            gray = self.tracker.prepare(frame)
+            tracked = self.tracker.track(gray)
+            if tracked is not None:
+                self.latency.record_since("convert", convert_started)
+                self.latency.count("tracked")
+                self._publish(timestamp_ms, rgb_frame, tracked, None, captured_at)
+                return True
+
+        inference_image, crop = self.framer.prepare(rgb_frame)
+        self.latency.record_since("convert", convert_started)
+
+        submit_started = time.perf_counter()
+        if self.inference_pool is not None:
+            # Workers busy: skip this frame rather than queue up stale ones.
+            if self.inference_pool.submit(inference_image, timestamp_ms):
+                with self._pending_lock:
+                    self._pending[timestamp_ms] = (rgb_frame, crop, gray, captured_at)
+                if self.tracker is not None:
+                    self.tracker.detection_submitted()
+            else:
+                self.latency.count("worker_rejected")
+            self.latency.record_since("submit", submit_started)
+            return True
+
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=inference_image)
+        with self._pending_lock:
+            self._pending[timestamp_ms] = (rgb_frame, crop, gray, captured_at)
+        if self.tracker is not None:
+            self.tracker.detection_submitted()
+        self.landmarker.detect_async(mp_image, timestamp_ms)
+        self.latency.record_since("submit", submit_started)
+        return True
+
+    def _poll_workers(self):
+        """Publish results that inference workers have sent back (worker mode only)."""
+        if self.inference_pool is None:
+            return
+        self.inference_pool.check_health()
+        for timestamp_ms, landmarks in self.inference_pool.poll():
+            self._handle_landmarks(timestamp_ms, landmarks, None, None)
+
+    def _discard_worker_results(self):
+        """Drop worker results and in-flight frames left over from before a turn.
+
+        Workers keep finishing frames between turns, with nothing polling
+        them; those results must not count as votes in the next turn. Frames
+        still in flight are forgotten too, so their results are ignored when
+        they arrive.
+        """
+        if self.inference_pool is None:
+            return
+        self.inference_pool.check_health(interval=0)
+        stale = len(self.inference_pool.poll())
+        with self._pending_lock:
+            stale += len(self._pending)
+            self._pending.clear()
+        if self.tracker is not None:
+            self.tracker.reset()
+        if stale:
+            logging.debug(f"Discarded {stale} worker results from before the turn")
+
+    def _open_trace(self):
+        trace_dir = self.vision_options["trace_dir"]
+        if not trace_dir:
+            return
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(trace_dir, f"turn-{int(time.time() * 1000)}.trace")
+        with self._trace_lock:
+            self.trace_writer = landmark_trace.TraceWriter(
+                path,
+                max_poses=self.num_players,
+                metadata={
+                    "solo_play": SOLO_PLAY,
+                    "model": self.model_variant,
+                    "num_players": self.num_players,
+                    "player_zones": self.vision_options["player_zones"],
+                },
+            )
+        logging.info(f"Recording landmark trace to {path}")
+
+    def _close_trace(self):
+        with self._trace_lock:
+            if self.trace_writer is not None:
+                self.trace_writer.close()
+                self.trace_writer = None
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        """Landmarker callback: map landmarks back to the full frame and publish them."""
+        self._handle_landmarks(
+            timestamp_ms,
+            landmarks_to_array(result.pose_landmarks),
+            output_image.numpy_view(),
+            result,
+        )
 
-            if right_wrist.visibility > MIN_TRACKING_CONFIDENCE:
-                cv2.putText(
-                    annotated_image,
-                    "Right wrist",
-                    (
-                        int(right_wrist.x * WIDTH),
-                        int(right_wrist.y * HEIGHT),
-                    ),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (0, 0, 255),
-                    2,
-                    cv2.LINE_AA,
+    def _handle_landmarks(self, timestamp_ms, landmarks, fallback_frame, result):
+        skipped = 0
+        with self._pending_lock:
+            # The landmarker may skip frames; those never come back.
+            while self._pending and next(iter(self._pending)) < timestamp_ms:
+                self._pending.popitem(last=False)
+                skipped += 1
+            pending = self._pending.pop(timestamp_ms, None)
+        if skipped:
+            self.latency.count("skipped", skipped)
+        if pending is None:
+            if fallback_frame is None:
+                return
+            rgb_frame, crop, gray, captured_at = fallback_frame, framing.FULL_FRAME, None, None
+        else:
+            rgb_frame, crop, gray, captured_at = pending
+
+        landmarks = framing.to_frame_coordinates(landmarks, crop)
+        if self.tracker is not None and gray is not None:
+            self.tracker.set_keyframe(landmarks, gray)
+        self._publish(timestamp_ms, rgb_frame, landmarks, result, captured_at)
+
+    def _publish(self, timestamp_ms, rgb_frame, landmarks, result, captured_at=None):
+        """Record and publish full-frame landmarks, detected or tracked."""
+        publish_started = time.perf_counter()
+        self.framer.observe(landmarks)
+        with self._trace_lock:
+            if self.trace_writer is not None:
+                self.trace_writer.write(timestamp_ms, landmarks)
+        if not publish_result(self.results, result, rgb_frame, timestamp_ms, landmarks):
+            self.latency.count("rejected")
+        self.latency.record_since("publish", publish_started)
+        if captured_at is not None:
+            self.latency.record_since("result", captured_at)
+
+    def display_frame(self):
+        """The newest camera frame with the latest landmarks drawn on it, or None.
+
+        Annotation is done here, on demand, so only frames that are actually
+        shown get drawn on, and never on the landmarker's callback thread. The
+        frame is first scaled to the frame presenter's size, so the overlay is
+        drawn at display resolution whatever the capture resolution is. The
+        result stays valid until the next call that finds a newer frame or
+        result.
+        """
+        camera_frame = self._camera_frame
+        if camera_frame is None:
+            return None
+        timestamp_ms, bgr_frame, rgb_frame = camera_frame
+        latest = self.results.latest()
+        key = (timestamp_ms, latest.sequence if latest is not None else 0)
+        if key == self._displayed_key:
+            return self._displayed
+
+        with self.latency.measure("annotate"):
+            rgb_frame = self._scale_for_display(bgr_frame, rgb_frame)
+            if latest is not None and self.overlay.enabled:
+                rgb_frame = self.overlay.render(
+                    rgb_frame, latest.landmarks, latest.actions, MOVES
                 )
+        self._displayed_key = key
+        self._displayed = rgb_frame
+        return rgb_frame
+
+    def _scale_for_display(self, bgr_frame, rgb_frame):
+        """RGB version of a camera frame at the presenter's size, in a reused buffer."""
+        frame = bgr_frame if rgb_frame is None else rgb_frame
+        if self.frame_presenter is None:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb_frame is None else frame
+        width, height = self.frame_presenter.size
+        if frame.shape[:2] != (height, width):
+            if self._display_buffer is None or self._display_buffer.shape[:2] != (height, width):
+                self._display_buffer = np.empty((height, width, 3), dtype=np.uint8)
+            frame = cv2.resize(
+                frame, (width, height), dst=self._display_buffer, interpolation=cv2.INTER_LINEAR
+            )
+        elif rgb_frame is None:
+            frame = np.array(frame)
+        if rgb_frame is None:
+            # Convert after scaling down, or in the same buffer after scaling up.
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        return frame
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def scan(self, seconds, solo_play):
+        """Collect gesture votes for ``seconds`` and return the winning move(s)."""
+        return asyncio.run(self.scan_async(seconds, solo_play))
+
+    async def scan_async(self, seconds, solo_play):
+        """Run one turn as concurrent tasks on the running event loop.
+
+        Capture and inference submission run on the session's capture thread,
+        every result published to the channel is queued and voted on, and the
+        display and pygame events are serviced at display_fps. The turn ends
+        at the deadline, when the votes settle, when the window is closed or
+        when the frame source runs out, and the loop sleeps while none of the
+        tasks has anything to do.
+        """
+        global SOLO_PLAY
+
+        if not self.running:
+            self.start()
+
+        screen = pygame.display.get_surface()
+        if screen is None:
+            screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)
+            pygame.display.set_caption("WizViz Pose Detection")
+        if self.frame_presenter is None:
+            self.frame_presenter = presenter.FramePresenter(screen.get_size())
+
+        if solo_play:
+            SOLO_PLAY = True
+        self.framer.expected_poses = 1 if SOLO_PLAY else self.num_players
+        players = [1] if SOLO_PLAY else list(range(1, self.num_players + 1))
+        voter = voting.StreamingVoter(
+            self.num_players,
+            len(MOVES),
+            confidence_threshold=self.vision_options["confidence_threshold"],
+            min_frames=self.vision_options["min_turn_frames"],
+            hysteresis=self.vision_options["vote_hysteresis"],
+            stable_frames=self.vision_options["stable_frames"],
+            default_move=RESTING,
+        )
+        display_fps = self.vision_options["display_fps"]
+        display_interval = 1 / display_fps if display_fps > 0 else 0.0
+        started = time.monotonic()
+        self.latency.reset()
+        dropped_before = self.grabber.frames_dropped
+        self._discard_worker_results()
+        self._open_trace()
+
+        loop = asyncio.get_running_loop()
+        frame_ready = asyncio.Event()
+        # Every result published during the turn is queued and voted on.
+        pose_frames, queue_result = self.results.subscribe(loop)
+
+        def capture_step():
+            if not self._detect_next_frame():
+                # No frame within the wait: a camera hiccup (the grabber keeps
+                # retrying) unless the source has finished.
+                self._poll_workers()
+                return self.grabber.running
+            self._poll_workers()
+            return True
+
+        async def capture_frames():
+            while await loop.run_in_executor(self._capture_executor, capture_step):
+                frame_ready.set()
+
+
+        async def run_display():
+            # The display runs at its own rate, independent of inference.
+            while True:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.quit_requested = True
+                        return
+                display_frame = self.display_frame()
+                if display_frame is not None:
+                    with self.latency.measure("present"):
+                        self.frame_presenter.present(display_frame, screen)
+                        pygame.display.flip()
+                if display_interval:
+                    await asyncio.sleep(display_interval)
+                else:
+                    await frame_ready.wait()
+                    frame_ready.clear()
+
+        voting_task = asyncio.ensure_future(
+            voting.count_votes(
+                pose_frames, voter, players, self.vision_options["early_resolution"]
+            )
+        )
+        tasks = [
+            asyncio.ensure_future(capture_frames()),
+            voting_task,
+            asyncio.ensure_future(run_display()),
+        ]
+        try:
+            done, pending = await asyncio.wait(
+                tasks, timeout=seconds, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                task.result()  # Re-raise anything a task failed with.
+            resolved_early = voting_task in done
+        finally:
+            self.results.remove_listener(queue_result)
+            self._close_trace()
+
+        self.latency.count("dropped", self.grabber.frames_dropped - dropped_before)
+        self.last_turn_latency = self.latency.report()
+        logging.debug(f"Capture stats this turn: {self.grabber.stats()}")
+        if self.inference_pool is not None:
+            logging.debug(f"Inference worker stats: {self.inference_pool.stats()}")
+        if self.tracker is not None:
+            logging.debug(f"Tracking stats: {self.tracker.stats()}")
+
+        self.last_turn = voting.TurnResult(
+            moves=[MOVES[move] for move in voter.leader],
+            confidence=voter.confidence(),
+            frames=voter.frames.copy(),
+            elapsed=time.monotonic() - started,
+            resolved_early=resolved_early,
+        )
 
-    return annotated_image
-
-
-def scan(seconds, solo_play):
-    global SOLO_PLAY
-    
-    pygame.init()
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIDTH)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, HEIGHT)
-    screen = pygame.display.get_surface()
-    if screen is None:
-        screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.FULLSCREEN)    
-        pygame.display.set_caption("WizViz Pose Detection")
+        if (SOLO_PLAY):
+            return MOVES[voter.leader[1]]
 
+        else:
+            return tuple(MOVES[voter.leader[player]] for player in players)
 
-    def timer_callback():
-        nonlocal running
-        running = False
 
-    timer = threading.Timer(seconds, timer_callback)
-    timer.start()
+def scan(seconds, solo_play, session=None):
+    """Collect votes for one turn.
 
-    if solo_play:
-        SOLO_PLAY = True
-    p1_actions = [0, 0, 0, 0, 0]
-    """[Resting, Defending, Attacking, Healing, Special Attack]"""
-    p2_actions = [0, 0, 0, 0, 0]
-    """[Resting, Defending, Attacking, Healing, Special Attack]"""
-
-    actions = ["Resting", "Defending", "Attacking", "Healing", "Special Attack"]
-
-    with vision.PoseLandmarker.create_from_options(options) as landmarker:
-        global to_window
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    running = False
-
-            ret, frame = cap.read()
-            if not ret:
+    Pass the match's ``PoseSession`` to reuse its camera and landmarker; without
+    one a temporary session is opened and closed around the turn.
+    """
+    pygame.init()
+    if session is not None:
+        return session.scan(seconds, solo_play)
+
+    with PoseSession() as temporary_session:
+        moves = temporary_session.scan(seconds, solo_play)
+    if temporary_session.quit_requested:
+        pygame.quit()
+    return moves
+
+
+def benchmark_pipeline(source_spec, realtime=False, max_frames=None, vision_options=None):
+    """Run capture -> landmark -> classify over a frame source without a display.
+
+    With ``realtime`` off every frame is processed in order, one result at a
+    time, so the numbers are reproducible on machines without a webcam.
+    Returns a dict of throughput and latency figures.
+    """
+    if vision_options is None:
+        vision_options = load_vision_options()
+    source = capture.open_source(
+        source_spec,
+        vision_options["capture_width"],
+        vision_options["capture_height"],
+        realtime=realtime,
+        fps=vision_options["capture_fps"],
+        formats=vision_options["capture_formats"],
+    )
+    if not source.isOpened():
+        raise RuntimeError(f"Could not open frame source {source_spec}")
+    grabber = FrameGrabber(source, lossless=not source.realtime)
+    framer = framing.InferenceFramer(
+        inference_width=vision_options["inference_width"],
+        roi_cropping=vision_options["roi_cropping"],
+        roi_padding=vision_options["roi_padding"],
+        expected_poses=vision_options["num_players"],
+    )
+    variant = select_model_variant(vision_options, [])
+    move_counts = np.zeros(len(MOVES), dtype=np.int64)
+    latencies_ms = []
+    submitted = {}
+    result_ready = threading.Event()
+
+    def on_result(result, output_image, timestamp_ms):
+        crop, submitted_at = submitted.pop(timestamp_ms, (framing.FULL_FRAME, None))
+        landmarks = framing.to_frame_coordinates(
+            landmarks_to_array(result.pose_landmarks), crop
+        )
+        framer.observe(landmarks)
+        _, moves = classify_poses(landmarks)
+        np.add.at(move_counts, moves, 1)
+        if submitted_at is not None:
+            latencies_ms.append((time.perf_counter() - submitted_at) * 1000)
+        result_ready.set()
+
+    frames = 0
+    grabber.start()
+    started = time.perf_counter()
+    with vision.PoseLandmarker.create_from_options(
+        landmarker_options(vision_options, variant, result_callback=on_result)
+    ) as landmarker:
+        while max_frames is None or frames < max_frames:
+            grabbed = grabber.wait_for_frame()
+            if grabbed is None:
                 break
-
+            _, timestamp_ms, frame, _ = grabbed
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-            timestamp_ms = int(cv2.getTickCount() / cv2.getTickFrequency() * 1000)
-
-            landmarker.detect_async(mp_image, timestamp_ms)
-
-            if detection_result is not None:
-                for pose_landmarks in detection_result.pose_landmarks:
-                    action = define_action(pose_landmarks)
-                    # print(f"Player {action[0]}: {action[1]}")
-                    if action[0] == 1:
-                        if action[1] == "Resting":
-                            p1_actions[0] += 1
-                        elif action[1] == "Defending":
-                            p1_actions[1] += 1
-                        elif action[1] == "Attacking":
-                            p1_actions[2] += 1
-                        elif action[1] == "Healing":
-                            p1_actions[3] += 1
-                        else:
-                            p1_actions[4] += 1
-                    elif action[0] == 2:
-                        if action[1] == "Resting":
-                            p2_actions[0] += 1
-                        elif action[1] == "Defending":
-                            p2_actions[1] += 1
-                        elif action[1] == "Attacking":
-                            p2_actions[2] += 1
-                        elif action[1] == "Healing":
-                            p2_actions[3] += 1
-                        else:
-                            p2_actions[4] += 1
-                    else:
-                        continue
-
-            if to_window is not None:
-                # Flip the frame horizontally
-                flip_frame = cv2.flip(to_window, 1)
-                # Rotate the frame 270 degrees
-                frame_rotated = cv2.rotate(flip_frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                # Convert the frame from BGR to RGB (Pygame uses RGB)
-                frame_rgb = cv2.cvtColor(frame_rotated, cv2.COLOR_BGR2RGB)
-                # Convert the frame to a Pygame surface
-                frame_surface = pygame.surfarray.make_surface(frame_rgb)
-                # Display the surface on the Pygame screen
-                screen.blit(frame_surface, (0, 0))
-
-                pygame.display.flip()
-
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
-
-        cap.release()
-        # pygame.display.quit()
-        
-    max_action_index_p1 = np.argmax(p1_actions)
-    max_action_index_p2 = np.argmax(p2_actions)
-    if (SOLO_PLAY):
-        return actions[max_action_index_p1]
-    
-    else:
-        return tuple([actions[max_action_index_p1], actions[max_action_index_p2]])
-
-# print(scan(5, True))
+            inference_image, crop = framer.prepare(rgb_frame)
+            submitted[timestamp_ms] = (crop, time.perf_counter())
+            result_ready.clear()
+            landmarker.detect_async(
+                mp.Image(image_format=mp.ImageFormat.SRGB, data=inference_image),
+                timestamp_ms,
+            )
+            frames += 1
+            if not source.realtime:
+                result_ready.wait(timeout=5.0)
+    elapsed = time.perf_counter() - started
+    grabber.stop()
+    source.release()
+
+    return {
+        "model": variant,
+        "frames": frames,
+        "results": len(latencies_ms),
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "latency_ms_p50": float(np.percentile(latencies_ms, 50)) if latencies_ms else None,
+        "latency_ms_p95": float(np.percentile(latencies_ms, 95)) if latencies_ms else None,
+        "moves": dict(zip(MOVES, move_counts.tolist())),
+        "capture": grabber.stats(),
+        "capture_format": getattr(source, "granted", None),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the vision pipeline on a camera, video file, image directory or .npz"
+    )
+    parser.add_argument("source", help="camera index, video file, image directory or .npz")
+    parser.add_argument(
+        "--realtime", action="store_true", help="pace recorded sources at their frame rate"
+    )
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    parser.add_argument("--model", choices=MODEL_VARIANTS, help="override vision_options.model")
+    args = parser.parse_args()
+
+    bench_options = load_vision_options()
+    if args.model:
+        bench_options["model"] = args.model
+    for key, value in benchmark_pipeline(
+        args.source, args.realtime, args.frames, bench_options
+    ).items():
+        print(f"{key}: {value}")
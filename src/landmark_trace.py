@@ -0,0 +1,166 @@
+"""Record landmarker results to compact trace files and replay them offline.
+
+A trace is a short JSON header followed by fixed-size records, one per
+PoseLandmarkerResult: an int64 timestamp, an int32 pose count and a
+float32 (max_poses, 33, 4) landmark block. Fixed-size records mean a trace
+can be memory-mapped and classified in one vectorized call, with no camera or
+model involved.
+
+    python src/landmark_trace.py traces/*.trace
+"""
+
+import json
+import struct
+import time
+import logging
+
+import numpy as np
+
+MAGIC = b"SPXTRACE"
+VERSION = 1
+NUM_LANDMARKS = 33
+
+
+def record_dtype(max_poses):
+    return np.dtype(
+        [
+            ("timestamp_ms", "<i8"),
+            ("num_poses", "<i4"),
+            ("landmarks", "<f4", (max_poses, NUM_LANDMARKS, 4)),
+        ]
+    )
+
+
+class TraceWriter:
+    """Appends landmark arrays to a trace file as they arrive."""
+
+    def __init__(self, path, max_poses=2, metadata=None):
+        self.path = path
+        self.max_poses = max_poses
+        self.frames = 0
+        self._record = np.zeros(1, dtype=record_dtype(max_poses))
+        header = dict(metadata or {})
+        header.update(
+            {"version": VERSION, "max_poses": max_poses, "created": time.time()}
+        )
+        header_bytes = json.dumps(header).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._file.write(struct.pack("<I", len(header_bytes)))
+        self._file.write(header_bytes)
+
+    def write(self, timestamp_ms, landmarks):
+        """Append one result's (num_poses, 33, 4) landmarks."""
+        num_poses = min(len(landmarks), self.max_poses)
+        record = self._record[0]
+        record["timestamp_ms"] = timestamp_ms
+        record["num_poses"] = num_poses
+        record["landmarks"][:] = 0
+        record["landmarks"][:num_poses] = landmarks[:num_poses]
+        self._file.write(self._record.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            logging.debug(f"Wrote {self.frames} frames to trace {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_trace(path):
+    """Return (header, records) with records memory-mapped from the file."""
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a landmark trace")
+        (header_length,) = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(header_length).decode("utf-8"))
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported trace version {header.get('version')} in {path}")
+    offset = len(MAGIC) + 4 + header_length
+    dtype = record_dtype(header["max_poses"])
+    if _file_size(path) == offset:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=offset)
+
+
+def _file_size(path):
+    with open(path, "rb") as file:
+        file.seek(0, 2)
+        return file.tell()
+
+
+def replay(path, solo_play=None, vision_options=None):
+    """Feed a trace through classification and the turn voter.
+
+    Returns a dict with the per-frame player ids and move codes, the moves the
+    voter settles on, their confidence, and the frame at which early turn
+    resolution would have ended the turn (None if it wouldn't have).
+    """
+    import imaging
+    import voting
+
+    header, records = read_trace(path)
+    if solo_play is None:
+        solo_play = header.get("solo_play", False)
+    if vision_options is None:
+        vision_options = imaging.load_vision_options()
+
+    num_players = header.get("num_players", header["max_poses"])
+    zones = imaging.player_zones(num_players, header.get("player_zones"))
+
+    landmarks = np.asarray(records["landmarks"])
+    present = np.arange(landmarks.shape[1]) < np.asarray(records["num_poses"])[:, None]
+    player_ids, moves = imaging.classify_poses(landmarks, solo_play=solo_play, zones=zones)
+    player_ids = np.where(present, player_ids, 0)
+    weights = np.where(present, imaging.pose_weights(landmarks), 0)
+
+    players = [1] if solo_play else list(range(1, num_players + 1))
+    voter = voting.StreamingVoter(
+        num_players,
+        len(imaging.MOVES),
+        confidence_threshold=vision_options["confidence_threshold"],
+        min_frames=vision_options["min_turn_frames"],
+        hysteresis=vision_options["vote_hysteresis"],
+        stable_frames=vision_options["stable_frames"],
+        default_move=imaging.RESTING,
+    )
+    settled_at = None
+    for frame in range(len(landmarks)):
+        visible = present[frame]
+        voter.add(player_ids[frame][visible], moves[frame][visible], weights[frame][visible])
+        if settled_at is None and voter.settled(players):
+            settled_at = frame
+
+    return {
+        "frames": len(landmarks),
+        "player_ids": player_ids,
+        "moves": moves,
+        "result": [imaging.MOVES[voter.leader[player]] for player in players],
+        "confidence": [float(voter.confidence()[player]) for player in players],
+        "settled_at": settled_at,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay landmark traces offline")
+    parser.add_argument("traces", nargs="+", help="trace files to replay")
+    parser.add_argument("--solo", action="store_true", default=None, help="treat as solo play")
+    args = parser.parse_args()
+
+    for trace_path in args.traces:
+        started = time.perf_counter()
+        outcome = replay(trace_path, solo_play=args.solo)
+        elapsed = time.perf_counter() - started
+        fps = outcome["frames"] / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"{trace_path}: {outcome['frames']} frames -> {outcome['result']} "
+            f"confidence={[round(c, 2) for c in outcome['confidence']]} "
+            f"settled_at={outcome['settled_at']} ({fps:.0f} frames/s)"
+        )
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+STAGES = ("read", "convert", "submit", "result", "publish", "annotate", "present")
+"""Pipeline stages, in the order a frame goes through them:
+
+read      source.read() on the grabber thread (cap.read() for cameras)
+convert   BGR->RGB conversion, ROI crop and resize for inference
+submit    detect_async / worker submit call
+result    capture to published landmarks, per frame (keyed by timestamp_ms)
+publish   result handling: classification and trace
+annotate  scaling a displayed frame to the screen and drawing the skeleton on it
+present   scaling the frame onto the screen and display.flip()
+"""
+COUNTERS = (
+    "dropped",
+    "throttled",
+    "skipped",
+    "rejected",
+    "worker_rejected",
+    "tracked",
+    "held",
+)
+"""dropped: frames the grabber overwrote before anyone read them;
+throttled: frames shown but not run through inference, per inference_fps;
+skipped: frames sent to the landmarker that never produced a result;
+rejected: results discarded by the last_timestamp_ms ordering check;
+worker_rejected: frames dropped because every worker slot was busy;
+tracked: frames resolved by optical flow instead of the landmarker;
+held: frames shown but not tracked while a keyframe detection was in flight"""
+PERCENTILES = (50, 95, 99)
+
+StageStats = namedtuple("StageStats", ["count", "p50", "p95", "p99", "max"])
+"""Latency distribution of one stage, in milliseconds"""
+LatencyReport = namedtuple("LatencyReport", ["stages", "counters", "elapsed"])
+"""Per-turn summary: stage name -> StageStats, counter name -> int, seconds covered"""
+
+
+class LatencyRecorder:
+    """Collects per-stage timings of the vision pipeline for one turn.
+
+    Stages are timed with time.perf_counter and stored as millisecond samples;
+    recording is thread-safe, since the grabber thread and the landmarker
+    callback report alongside the main loop. ``report()`` reduces the samples
+    to percentiles, and ``reset()`` starts the next turn.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {stage: [] for stage in STAGES}
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._started = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            for counter in self._counters:
+                self._counters[counter] = 0
+            self._started = time.perf_counter()
+
+    def record(self, stage, milliseconds):
+        with self._lock:
+            self._samples[stage].append(milliseconds)
+
+    def record_since(self, stage, started):
+        """Record the time since ``started`` (a time.perf_counter() value)."""
+        self.record(stage, (time.perf_counter() - started) * 1000)
+
+    @contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_since(stage, started)
+
+    def count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def report(self):
+        """Summarize everything recorded since the last reset."""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counters = dict(self._counters)
+            elapsed = time.perf_counter() - self._started
+        stages = {}
+        for stage, values in samples.items():
+            if len(values) == 0:
+                stages[stage] = StageStats(0, None, None, None, None)
+                continue
+            p50, p95, p99 = np.percentile(values, PERCENTILES)
+            stages[stage] = StageStats(
+                len(values), float(p50), float(p95), float(p99), float(values.max())
+            )
+        return LatencyReport(stages, counters, elapsed)
+
+
+def format_report(report):
+    """One-line-per-stage text version of a LatencyReport, for logs."""
+    lines = []
+    for stage, stats in report.stages.items():
+        if not stats.count:
+            continue
+        lines.append(
+            f"{stage:>8}: n={stats.count:<4} p50={stats.p50:6.1f} p95={stats.p95:6.1f} "
+            f"p99={stats.p99:6.1f} max={stats.max:6.1f} ms"
+        )
+    counters = ", ".join(f"{name}={value}" for name, value in report.counters.items())
+    lines.append(f"{'frames':>8}: {counters} over {report.elapsed:.2f}s")
+    return "\n".join(lines)
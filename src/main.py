@@ -3,6 +3,7 @@ import yaml
 import sys
 import os
 import Player_List
+import text_cache
 import random
 
 
@@ -32,18 +33,8 @@ def save_options(options):
         yaml.dump(options, file)
 
 
-# Initialize Pygame
-pygame.init()
-
-# Initialize background music
-pygame.mixer.music.load('src/sounds/bg_music.wav')
-pygame.mixer.music.play(-1)  # -1 means loop indefinitely[10]
-pygame.mixer.music.set_volume(0.5)  # Set volume to 50%[3]
-
 # Screen dimensions
 SCREEN_WIDTH, SCREEN_HEIGHT = 1920, 1080  # Init heights, can change to 1020x1080rez
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
-pygame.display.set_caption("WizViz")
 
 # Colors
 WHITE, BLACK, GRAY, LIGHT_GRAY = (
@@ -60,17 +51,6 @@ BLUE, LIGHT_BLUE, DARK_GRAY, GREEN, RED = (
     (255, 0, 0),
 )
 
-# Fonts
-FONT, TITLE_FONT, TOOLTIP_FONT = (
-    pygame.font.Font(None, 36),
-    pygame.font.Font(None, 120),
-    pygame.font.Font(None, 24),
-)
-
-# Load options
-options = load_options()
-print(options)
-
 
 # Button class for UI
 def draw_button(text, x, y, width, height, color, hover_color, mouse_pos):
@@ -81,7 +61,7 @@ def draw_button(text, x, y, width, height, color, hover_color, mouse_pos):
         rect,
         border_radius=10,
     )
-    text_surface = FONT.render(text, True, BLACK)
+    text_surface = text_cache.render(FONT, text, BLACK)
     screen.blit(text_surface, text_surface.get_rect(center=rect.center))
     return rect
 
@@ -100,7 +80,7 @@ def main_menu():
         screen.blit(a, (0, 0))
         mouse_pos = pygame.mouse.get_pos()
 
-        title_text = TITLE_FONT.render("WizViz", True, DARK_GRAY)
+        title_text = text_cache.render(TITLE_FONT, "WizViz", DARK_GRAY)
         screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, (SCREEN_HEIGHT / 6)))
 
         buttons = {
@@ -142,7 +122,7 @@ def options_menu():
         
         y_offset = 3
         
-        title_text = TITLE_FONT.render("Options", True, DARK_GRAY)
+        title_text = text_cache.render(TITLE_FONT, "Options", DARK_GRAY)
         screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, (SCREEN_HEIGHT / 12)))
 
         option_keys = list(options["base_options"].keys())
@@ -266,8 +246,8 @@ def start_game():
 
             y_offset = 1
 
-            title_text = TITLE_FONT.render(
-                f"Select Player {player_num}", True, DARK_GRAY
+            title_text = text_cache.render(
+                TITLE_FONT, f"Select Player {player_num}", DARK_GRAY
             )
             screen.blit(
                 title_text, (((SCREEN_WIDTH - title_text.get_width()) // 2), ((y_offset * SCREEN_HEIGHT) / 15))
@@ -342,7 +322,7 @@ def start_game():
         for i in range(3, 0, -1):
             screen.blit(a, (0, 0))
             #screen.fill(WHITE)
-            countdown_text = TITLE_FONT.render(str(i), True, DARK_GRAY)
+            countdown_text = text_cache.render(TITLE_FONT, str(i), DARK_GRAY)
             screen.blit(
                 countdown_text,
                 (
@@ -360,6 +340,32 @@ def start_game():
         engine.run()
 
 
-# Run main menu
-main_menu()
-pygame.quit()
+# Everything with side effects runs only when started as a script: pose
+# inference workers are spawned processes that re-import this module as
+# __mp_main__, and must not open a window or start the menu.
+if __name__ == "__main__":
+    # Initialize Pygame
+    pygame.init()
+
+    # Initialize background music
+    pygame.mixer.music.load('src/sounds/bg_music.wav')
+    pygame.mixer.music.play(-1)  # -1 means loop indefinitely[10]
+    pygame.mixer.music.set_volume(0.5)  # Set volume to 50%[3]
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
+    pygame.display.set_caption("WizViz")
+
+    # Fonts
+    FONT, TITLE_FONT, TOOLTIP_FONT = (
+        pygame.font.Font(None, 36),
+        pygame.font.Font(None, 120),
+        pygame.font.Font(None, 24),
+    )
+
+    # Load options
+    options = load_options()
+    print(options)
+
+    # Run main menu
+    main_menu()
+    pygame.quit()
@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+
+POSE_CONNECTIONS = np.array(
+    [
+        (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+        (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+        (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20), (11, 23),
+        (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+        (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+    ],
+    dtype=np.int64,
+)
+"""Landmark index pairs joined by the skeleton, as in mp.solutions.pose.POSE_CONNECTIONS"""
+NOSE = 0
+
+CONNECTION_COLOR = (224, 224, 224)
+LANDMARK_COLOR = (255, 138, 0)
+LABEL_COLOR = (255, 255, 255)
+
+
+class SkeletonOverlay:
+    """Draws pose skeletons straight from a (num_poses, 33, 4) landmark array.
+
+    Drawing happens in a buffer that is reused between frames, so callers must
+    copy or convert the returned image before the next render() call. With
+    ``enabled`` off, render() returns the input frame untouched.
+    """
+
+    def __init__(self, enabled=True, show_labels=False, min_visibility=0.5):
+        self.enabled = enabled
+        self.show_labels = show_labels
+        self.min_visibility = min_visibility
+        self._buffer = None
+
+    def render(self, rgb_frame, landmarks, actions, move_names):
+        if rgb_frame is None:
+            return None
+        if not self.enabled or len(landmarks) == 0:
+            return rgb_frame
+
+        if self._buffer is None or self._buffer.shape != rgb_frame.shape:
+            self._buffer = np.empty_like(rgb_frame)
+        np.copyto(self._buffer, rgb_frame)
+        image = self._buffer
+
+        height, width = image.shape[:2]
+        points = np.rint(landmarks[..., :2] * (width, height)).astype(np.int32)
+        visible = landmarks[..., 3] >= self.min_visibility
+
+        # Segments whose both ends are visible, as an (n, 2, 2) array for polylines.
+        both_visible = (
+            visible[:, POSE_CONNECTIONS[:, 0]] & visible[:, POSE_CONNECTIONS[:, 1]]
+        )
+        segments = points[:, POSE_CONNECTIONS][both_visible]
+        if len(segments):
+            cv2.polylines(image, segments, False, CONNECTION_COLOR, 2, cv2.LINE_AA)
+        for x, y in points[visible].tolist():
+            cv2.circle(image, (x, y), 3, LANDMARK_COLOR, -1, cv2.LINE_AA)
+
+        if self.show_labels:
+            player_numbers, moves = actions[:2]
+            for pose_index in range(len(landmarks)):
+                x, y = points[pose_index, NOSE]
+                cv2.putText(
+                    image,
+                    f"Player {player_numbers[pose_index]}: {move_names[moves[pose_index]]}",
+                    (int(x), int(y)),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    1,
+                    LABEL_COLOR,
+                    2,
+                    cv2.LINE_AA,
+                )
+        return image
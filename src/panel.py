@@ -0,0 +1,64 @@
+from collections import namedtuple
+
+import pygame
+
+Widget = namedtuple("Widget", ["key", "rect", "state", "background", "paint"])
+"""One element of a Panel.
+
+key         identifies the widget between frames
+rect        pygame.Rect it covers, in panel coordinates
+state       whatever the widget shows; it is repainted when this changes (==)
+background  color the rect is cleared to first, or None to paint over what is beneath
+paint       paint(surface, rect, state) draws the widget onto the panel surface
+"""
+
+
+class Panel:
+    """Retained-mode screen area that only repaints the widgets that changed.
+
+    The panel keeps its own surface and remembers the state every widget
+    was last painted with. ``draw`` repaints the widgets whose state differs,
+    plus any widget overlapping an area repainted before it in the same pass
+    (so widgets drawn on top of others survive), copies just those rects to
+    the screen and returns them in screen coordinates for
+    pygame.display.update(rects). Nothing is returned when nothing changed.
+    """
+
+    def __init__(self, screen, position, size, background=(50, 50, 50)):
+        self.screen = screen
+        self.position = position
+        self.background = background
+        self.surface = pygame.Surface(size)
+        self._painted = {}
+        self._full_redraw = True
+
+    def invalidate(self):
+        """Repaint everything on the next draw, e.g. after the screen was drawn over."""
+        self._painted.clear()
+        self._full_redraw = True
+
+    def draw(self, widgets):
+        """Repaint changed widgets (in list order) and return the dirty screen rects."""
+        dirty = []
+        if self._full_redraw:
+            self.surface.fill(self.background)
+            dirty.append(self.surface.get_rect())
+        for widget in widgets:
+            unchanged = widget.key in self._painted and self._painted[widget.key] == widget.state
+            if unchanged and widget.rect.collidelist(dirty) == -1:
+                continue
+            if widget.background is not None:
+                self.surface.fill(widget.background, widget.rect)
+            widget.paint(self.surface, widget.rect, widget.state)
+            self._painted[widget.key] = widget.state
+            dirty.append(widget.rect)
+        if self._full_redraw:
+            dirty = dirty[:1]
+            self._full_redraw = False
+
+        screen_rects = []
+        for rect in dirty:
+            screen_rect = rect.move(self.position)
+            self.screen.blit(self.surface, screen_rect, rect)
+            screen_rects.append(screen_rect)
+        return screen_rects
@@ -0,0 +1,228 @@
+import logging
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker_main(
+    worker_id, generation, shm_name, ring_shape, vision_options, variant, tasks, results, heartbeat
+):
+    """Worker process: run the landmarker on frames handed over through shared memory."""
+    import mediapipe as mp
+    from mediapipe.tasks.python import vision
+
+    import imaging
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    options = imaging.landmarker_options(
+        vision_options, variant, running_mode=vision.RunningMode.VIDEO
+    )
+    try:
+        with vision.PoseLandmarker.create_from_options(options) as landmarker:
+            heartbeat.value = time.monotonic()
+            while True:
+                try:
+                    task = tasks.get(timeout=0.5)
+                except queue.Empty:
+                    heartbeat.value = time.monotonic()
+                    continue
+                if task is None:
+                    break
+                slot, timestamp_ms, height, width = task
+                image = np.array(ring[slot, :height, :width])
+                result = landmarker.detect_for_video(
+                    mp.Image(image_format=mp.ImageFormat.SRGB, data=image), timestamp_ms
+                )
+                results.put(
+                    (
+                        (worker_id, generation),
+                        slot,
+                        timestamp_ms,
+                        imaging.landmarks_to_array(result.pose_landmarks),
+                    )
+                )
+                heartbeat.value = time.monotonic()
+    finally:
+        del ring
+        shm.close()
+
+
+class InferencePool:
+    """Runs PoseLandmarker in worker processes fed through shared memory.
+
+    Inference images are copied into slots of one shared-memory ring; workers
+    only receive (slot, timestamp, size) messages and send back compact
+    (num_poses, 33, 4) landmark arrays, so the game process never runs the
+    model. Workers that die or stop sending heartbeats for ``timeout`` seconds
+    are restarted, and the frames they held are dropped.
+    """
+
+    def __init__(
+        self,
+        vision_options,
+        variant,
+        num_workers=1,
+        max_side=640,
+        timeout=5.0,
+        startup_timeout=30.0,
+    ):
+        self.vision_options = vision_options
+        self.variant = variant
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.ring_shape = (2 * num_workers, max_side, max_side, 3)
+        self.frames_submitted = 0
+        self.frames_rejected = 0
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._shm = None
+        self._ring = None
+        self._results = None
+        self._workers = {}
+        """worker_id -> dict(process, generation, spawned, tasks, heartbeat, slots)"""
+        self._generation = 0
+        self._free_slots = []
+        self._last_health_check = 0.0
+
+    @property
+    def running(self):
+        return self._shm is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=int(np.prod(self.ring_shape))
+        )
+        self._ring = np.ndarray(self.ring_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._results = self._context.Queue()
+        self._free_slots = list(range(self.ring_shape[0]))
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        logging.info(f"Started {self.num_workers} pose inference worker(s)")
+
+    def _spawn(self, worker_id):
+        tasks = self._context.Queue()
+        # 0 until the worker has loaded its model.
+        heartbeat = self._context.Value("d", 0.0)
+        self._generation += 1
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self._generation,
+                self._shm.name,
+                self.ring_shape,
+                self.vision_options,
+                self.variant,
+                tasks,
+                self._results,
+                heartbeat,
+            ),
+            name=f"PoseWorker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = {
+            "process": process,
+            "generation": self._generation,
+            "spawned": time.monotonic(),
+            "tasks": tasks,
+            "heartbeat": heartbeat,
+            "slots": set(),
+        }
+
+    def submit(self, image, timestamp_ms):
+        """Queue an RGB image; returns False (frame dropped) if every slot is busy."""
+        height, width = image.shape[:2]
+        if height > self.ring_shape[1] or width > self.ring_shape[2]:
+            raise ValueError(
+                f"Inference image {width}x{height} exceeds the {self.ring_shape[2]}px worker slots"
+            )
+        if not self._free_slots:
+            self.frames_rejected += 1
+            return False
+        slot = self._free_slots.pop()
+        self._ring[slot, :height, :width] = image
+        worker_id = min(self._workers, key=lambda key: len(self._workers[key]["slots"]))
+        worker = self._workers[worker_id]
+        worker["slots"].add(slot)
+        worker["tasks"].put((slot, timestamp_ms, height, width))
+        self.frames_submitted += 1
+        return True
+
+    def poll(self):
+        """Return the (timestamp_ms, landmarks) results that are ready, oldest first."""
+        ready = []
+        while True:
+            try:
+                (worker_id, generation), slot, timestamp_ms, landmarks = (
+                    self._results.get_nowait()
+                )
+            except queue.Empty:
+                break
+            worker = self._workers.get(worker_id)
+            # Slots of a restarted worker were already freed and may be reused.
+            if worker is not None and worker["generation"] == generation:
+                worker["slots"].discard(slot)
+                self._free_slots.append(slot)
+            ready.append((timestamp_ms, landmarks))
+        ready.sort(key=lambda item: item[0])
+        return ready
+
+    def check_health(self, interval=0.5):
+        """Restart workers that died or stopped sending heartbeats."""
+        now = time.monotonic()
+        if now - self._last_health_check < interval:
+            return
+        self._last_health_check = now
+        for worker_id, worker in list(self._workers.items()):
+            process = worker["process"]
+            heartbeat = worker["heartbeat"].value
+            if heartbeat == 0.0:
+                stale = now - worker["spawned"] > self.startup_timeout
+            else:
+                stale = now - heartbeat > self.timeout
+            if process.is_alive() and not stale:
+                continue
+            logging.warning(
+                f"Pose worker {worker_id} {'stalled' if process.is_alive() else 'died'}"
+                f" (exit code {process.exitcode}), restarting"
+            )
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1.0)
+            self._free_slots.extend(worker["slots"])
+            self.restarts += 1
+            self._spawn(worker_id)
+
+    def stop(self):
+        if not self.running:
+            return
+        for worker in self._workers.values():
+            worker["tasks"].put(None)
+        for worker in self._workers.values():
+            worker["process"].join(timeout=2.0)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self._workers = {}
+        self._ring = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+        logging.info(
+            f"Stopped pose inference workers: submitted={self.frames_submitted}, "
+            f"rejected={self.frames_rejected}, restarts={self.restarts}"
+        )
+
+    def stats(self):
+        return {
+            "submitted": self.frames_submitted,
+            "rejected": self.frames_rejected,
+            "restarts": self.restarts,
+        }
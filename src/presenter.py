@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import pygame
+
+
+class FramePresenter:
+    """Puts RGB camera frames on screen through preallocated buffers.
+
+    Scaling and optional mirroring happen once, into NumPy buffers that are
+    reused between frames, and the result is written into one persistent
+    pygame.Surface with surfarray.blit_array. No per-frame surfaces or color
+    conversions are created.
+    """
+
+    def __init__(self, size, mirror=False):
+        self.size = size
+        self.mirror = mirror
+        width, height = size
+        self._scaled = np.empty((height, width, 3), dtype=np.uint8)
+        self._mirrored = np.empty((height, width, 3), dtype=np.uint8)
+        self.surface = None
+
+    def _ensure_surface(self):
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size)
+            if pygame.display.get_surface() is not None:
+                # Match the display format so blits are plain copies.
+                self.surface = self.surface.convert()
+        return self.surface
+
+    def prepare(self, rgb_frame):
+        """Scale (and mirror) an RGB frame into the presenter's buffers."""
+        width, height = self.size
+        if rgb_frame.shape[:2] == (height, width):
+            frame = rgb_frame
+        else:
+            cv2.resize(
+                rgb_frame, (width, height), dst=self._scaled, interpolation=cv2.INTER_LINEAR
+            )
+            frame = self._scaled
+        if self.mirror:
+            cv2.flip(frame, 1, dst=self._mirrored)
+            frame = self._mirrored
+        surface = self._ensure_surface()
+        # surfarray indexes pixels as [x][y], so hand it the transposed view.
+        pygame.surfarray.blit_array(surface, frame.swapaxes(0, 1))
+        return surface
+
+    def present(self, rgb_frame, target, position=(0, 0)):
+        """Draw an RGB frame onto ``target`` at ``position``."""
+        target.blit(self.prepare(rgb_frame), position)
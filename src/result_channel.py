@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from collections import namedtuple
+
+PoseFrame = namedtuple(
+    "PoseFrame", ["sequence", "timestamp_ms", "frame", "landmarks", "actions", "result"]
+)
+"""One published landmarker result.
+
+sequence      increases by one per published result, starting at 1
+timestamp_ms  timestamp the frame was sent to the landmarker with
+frame         RGB frame for display; never written to after publishing
+landmarks     (num_poses, 33, 4) full-frame landmarks
+actions       (player_ids, move_codes, vote_weights) for those poses
+result        the PoseLandmarkerResult, or None for worker or tracked results
+"""
+
+
+class ResultChannel:
+    """Hands the newest landmarker result from the publishing threads to readers.
+
+    Every publish builds a new immutable PoseFrame and swaps it in with a
+    single reference assignment, so readers never take a lock and can never
+    see the frame of one result with the landmarks of another. Writers (the
+    landmarker callback and, with workers or tracking, the capture thread)
+    share a short lock only to order timestamps. Readers remember the last sequence
+    number they handled and ``poll`` past it, so each result is processed
+    once. Callables registered with ``add_listener`` are called with every
+    published PoseFrame, in publishing order, on the publishing thread, and
+    must not block. Readers that must see every result rather than the
+    newest one, like the turn's voter, ``subscribe`` an asyncio queue.
+    """
+
+    def __init__(self):
+        self._latest = None
+        self._write_lock = threading.Lock()
+        self.last_timestamp_ms = 0
+        self.published = 0
+        self.rejected = 0
+        self._listeners = ()
+
+    def publish(self, timestamp_ms, frame, landmarks, actions, result=None):
+        """Publish a result; returns False if it is older than the last one published."""
+        with self._write_lock:
+            if timestamp_ms < self.last_timestamp_ms:
+                self.rejected += 1
+                return False
+            self.last_timestamp_ms = timestamp_ms
+            self.published += 1
+            self._latest = PoseFrame(
+                self.published, timestamp_ms, frame, landmarks, actions, result
+            )
+            # Still under the lock, so listeners see frames in sequence order.
+            for listener in self._listeners:
+                listener(self._latest)
+        return True
+
+    def add_listener(self, listener):
+        with self._write_lock:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener):
+        with self._write_lock:
+            self._listeners = tuple(item for item in self._listeners if item is not listener)
+
+    def subscribe(self, loop):
+        """asyncio.Queue on ``loop`` that receives every PoseFrame published from now on.
+
+        Returns (queue, listener); pass the listener to remove_listener when done.
+        """
+        queue = asyncio.Queue()
+
+        def listener(pose_frame):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, pose_frame)
+            except RuntimeError:
+                pass  # The loop is already closed.
+
+        self.add_listener(listener)
+        return queue, listener
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest result, 0 before the first one."""
+        latest = self._latest
+        return latest.sequence if latest is not None else 0
+
+    def latest(self):
+        """The newest PoseFrame, or None if nothing was published yet."""
+        return self._latest
+
+    def poll(self, after_sequence):
+        """The newest PoseFrame if it is newer than ``after_sequence``, else None."""
+        latest = self._latest
+        if latest is None or latest.sequence <= after_sequence:
+            return None
+        return latest
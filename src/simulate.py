@@ -0,0 +1,270 @@
+"""Monte Carlo tournament between every pair of characters and AI policies.
+
+Matches are played headlessly with the combat rules and ai.wizard_bot_turn,
+in chunks spread over a process pool. Every match gets its own
+random.Random, seeded from the run seed and the match's position, so a run
+is reproducible whatever order the workers finish in and any single match
+can be replayed with match_seed. Partial standings are printed while the run goes on.
+
+    python src/simulate.py --matches 10000 --workers 8 --seed 1
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+import numpy as np
+
+import ai
+import combat
+import Player_List
+
+CHARACTERS = {
+    name: getattr(Player_List, name)
+    for name in (
+        "Draco",
+        "Hydra",
+        "Phoenix",
+        "Lyra",
+        "Orion",
+        "Pegasus",
+        "Andromeda",
+        "Centaurus",
+        "Cassiopeia",
+    )
+}
+POLICIES = {"random": 1, "fsm": 5}
+"""AI policy name -> wizard_bot difficulty: up to 3 picks moves at random, above uses the FSM"""
+WINS_A, WINS_B, DRAWS, TURNS, TURNS_SQUARED = range(5)
+Z_95 = 1.959964
+
+
+class PolicyBot:
+    """Presents a fighter to ai.wizard_bot_turn the way a wizard_bot would."""
+
+    def __init__(self, difficulty):
+        self.difficulty = difficulty
+        self.state = ""
+        self.fighter = None
+
+    def get_health(self):
+        return self.fighter.health
+
+    def get_mana(self):
+        return self.fighter.mana
+
+    def get_attack(self):
+        return self.fighter.attack
+
+    def has_enough_mana(self, value):
+        return self.fighter.mana >= value
+
+    def set_state(self, state):
+        self.state = state
+
+    def get_state(self):
+        return self.state
+
+
+def match_seed(seed, matchup_index, match_index):
+    """Seed of one match of a run; distinct matches get independent streams."""
+    return f"{seed}:{matchup_index}:{match_index}"
+
+
+def play_match(character_a, character_b, policy_a, policy_b, rng, max_turns=200):
+    """Play one AI-vs-AI match; returns (winner, turns) with winner 0, 1 or None for a draw.
+
+    Every random draw of the match (starting mana, AI choices, combat) comes
+    from ``rng``. Like GameEngine, the match ends once a fighter is down (or
+    after ``max_turns``) and the healthier fighter wins.
+    """
+    fighters = (
+        combat.fighter(CHARACTERS[character_a](rng=rng)),
+        combat.fighter(CHARACTERS[character_b](rng=rng)),
+    )
+    bots = (PolicyBot(POLICIES[policy_a]), PolicyBot(POLICIES[policy_b]))
+    turns = 0
+    while turns < max_turns and min(fighter.health for fighter in fighters) > 0:
+        for bot, fighter in zip(bots, fighters):
+            bot.fighter = fighter
+        moves = (
+            ai.wizard_bot_turn(bots[0], bots[1], rng=rng),
+            ai.wizard_bot_turn(bots[1], bots[0], rng=rng),
+        )
+        fighters = combat.resolve_turn(fighters, moves, rng=rng).fighters
+        turns += 1
+    health_a, health_b = fighters[0].health, fighters[1].health
+    if health_a == health_b:
+        return None, turns
+    return (0 if health_a > health_b else 1), turns
+
+
+def _play_chunk(task):
+    """Worker: play ``count`` matches of one matchup and return summed statistics."""
+    matchup_index, matchup, count, seed, max_turns, chunk_start = task
+    totals = np.zeros(5, dtype=np.float64)
+    for match_index in range(chunk_start, chunk_start + count):
+        rng = random.Random(match_seed(seed, matchup_index, match_index))
+        winner, turns = play_match(*matchup, rng=rng, max_turns=max_turns)
+        totals[DRAWS if winner is None else winner] += 1
+        totals[TURNS] += turns
+        totals[TURNS_SQUARED] += turns * turns
+    return matchup_index, totals
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    center = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return center - margin, center + margin
+
+
+def summarize(matchups, totals):
+    """One dict per matchup with win rates, their 95% CIs and mean match length."""
+    rows = []
+    for matchup, row in zip(matchups, totals):
+        played = row[WINS_A] + row[WINS_B] + row[DRAWS]
+        if played == 0:
+            continue
+        mean_turns = row[TURNS] / played
+        variance = max(row[TURNS_SQUARED] / played - mean_turns**2, 0.0)
+        rows.append(
+            {
+                "character_a": matchup[0],
+                "character_b": matchup[1],
+                "policy_a": matchup[2],
+                "policy_b": matchup[3],
+                "matches": int(played),
+                "win_rate_a": row[WINS_A] / played,
+                "win_rate_a_ci": wilson_interval(row[WINS_A], played),
+                "win_rate_b": row[WINS_B] / played,
+                "draw_rate": row[DRAWS] / played,
+                "mean_turns": mean_turns,
+                "mean_turns_ci": Z_95 * math.sqrt(variance / played),
+            }
+        )
+    return rows
+
+
+def character_standings(matchups, totals):
+    """Overall (wins, matches) per character across every matchup it played in."""
+    standings = {name: [0.0, 0.0] for name in CHARACTERS}
+    for matchup, row in zip(matchups, totals):
+        played = row[WINS_A] + row[WINS_B] + row[DRAWS]
+        standings[matchup[0]][0] += row[WINS_A]
+        standings[matchup[0]][1] += played
+        standings[matchup[1]][0] += row[WINS_B]
+        standings[matchup[1]][1] += played
+    return standings
+
+
+def format_standings(standings):
+    lines = []
+    for name, (wins, played) in sorted(
+        standings.items(), key=lambda item: -item[1][0] / max(item[1][1], 1)
+    ):
+        if not played:
+            continue
+        low, high = wilson_interval(wins, played)
+        lines.append(
+            f"  {name:<11} win rate {wins / played:6.1%} [{low:6.1%}, {high:6.1%}] over {int(played)}"
+        )
+    return "\n".join(lines)
+
+
+def run_tournament(
+    characters=None,
+    policies=None,
+    matches=1000,
+    workers=None,
+    seed=0,
+    chunk_size=250,
+    max_turns=200,
+    report_every=5.0,
+    out=sys.stdout,
+):
+    """Play ``matches`` matches per (character, character, policy, policy) matchup.
+
+    Returns (matchups, totals) where totals has one row of WINS_A, WINS_B,
+    DRAWS, TURNS, TURNS_SQUARED per matchup. Partial standings are written to
+    ``out`` every ``report_every`` seconds.
+    """
+    characters = list(characters or CHARACTERS)
+    policies = list(policies or POLICIES)
+    matchups = list(itertools.product(characters, characters, policies, policies))
+    tasks = []
+    for matchup_index, matchup in enumerate(matchups):
+        for chunk_start in range(0, matches, chunk_size):
+            count = min(chunk_size, matches - chunk_start)
+            tasks.append((matchup_index, matchup, count, seed, max_turns, chunk_start))
+    totals = np.zeros((len(matchups), 5), dtype=np.float64)
+    total_matches = matches * len(matchups)
+
+    started = time.perf_counter()
+    last_report = started
+    played = 0
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers) as pool:
+        for matchup_index, chunk_totals in pool.imap_unordered(_play_chunk, tasks):
+            totals[matchup_index] += chunk_totals
+            played += int(chunk_totals[WINS_A] + chunk_totals[WINS_B] + chunk_totals[DRAWS])
+            now = time.perf_counter()
+            if report_every and now - last_report >= report_every and played < total_matches:
+                last_report = now
+                print(
+                    f"{played}/{total_matches} matches ({played / (now - started):.0f}/s)\n"
+                    + format_standings(character_standings(matchups, totals)),
+                    file=out,
+                    flush=True,
+                )
+    elapsed = time.perf_counter() - started
+    print(
+        f"Played {played} matches in {elapsed:.1f}s ({played / max(elapsed, 1e-9):.0f}/s)",
+        file=out,
+    )
+    return matchups, totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate AI-vs-AI matches between every character pair"
+    )
+    parser.add_argument("--matches", type=int, default=1000, help="matches per matchup")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the whole run")
+    parser.add_argument("--chunk-size", type=int, default=250, help="matches per worker task")
+    parser.add_argument("--max-turns", type=int, default=200, help="turns before a match is scored on health")
+    parser.add_argument("--characters", nargs="+", choices=list(CHARACTERS), help="characters to include")
+    parser.add_argument("--policies", nargs="+", choices=list(POLICIES), help="AI policies to include")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between partial results")
+    args = parser.parse_args()
+
+    matchups, totals = run_tournament(
+        characters=args.characters,
+        policies=args.policies,
+        matches=args.matches,
+        workers=args.workers,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        max_turns=args.max_turns,
+        report_every=args.report_every,
+    )
+    print("Characters:\n" + format_standings(character_standings(matchups, totals)))
+    print("Matchups (A vs B, policies):")
+    for row in summarize(matchups, totals):
+        low, high = row["win_rate_a_ci"]
+        print(
+            f"  {row['character_a']:>10} vs {row['character_b']:<10} "
+            f"{row['policy_a']:>6}/{row['policy_b']:<6} "
+            f"A {row['win_rate_a']:6.1%} [{low:6.1%}, {high:6.1%}] "
+            f"B {row['win_rate_b']:6.1%} draw {row['draw_rate']:5.1%} "
+            f"turns {row['mean_turns']:5.1f} ± {row['mean_turns_ci']:.1f}"
+        )
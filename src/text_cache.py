@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Surfaces are keyed by (font, text, color, antialias), so a label that is
+    drawn every frame is only rendered by font.render the first time. The
+    returned surfaces are shared and must not be drawn on. ``hits`` and
+    ``misses`` count lookups since the last ``reset_counters``.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Same as font.render(text, antialias, color), from the cache when possible."""
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+CACHE = TextCache()
+"""Cache shared by the menus, the log window and the in-game HUD"""
+
+
+def render(font, text, color, antialias=True):
+    """Render text through the shared CACHE."""
+    return CACHE.render(font, text, color, antialias)
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class KeyframeTracker:
+    """Propagates landmarks between landmarker runs with Lucas-Kanade optical flow.
+
+    The landmarker runs on every ``keyframe_interval``-th frame; in between,
+    only ``points`` (the landmarks the gesture rules read) are tracked with
+    pyramidal LK on a small grayscale copy of the frame, and the rest of each
+    pose is shifted along with them. Tracking is dropped, forcing a fresh
+    detection on the next frame, when a point is lost, its forward-backward
+    error exceeds ``max_error`` pixels, or a pose moves more than
+    ``max_motion`` (normalized) between frames.
+
+    While a keyframe detection is in flight (submitted, result not back yet,
+    for at most ``detection_timeout`` seconds) no frames are tracked:
+    tracked results would carry newer timestamps than the detection and get
+    it rejected as out of order when it arrives.
+    """
+
+    def __init__(
+        self,
+        points,
+        keyframe_interval=3,
+        max_error=2.0,
+        max_motion=0.05,
+        tracking_width=480,
+        detection_timeout=0.5,
+    ):
+        self.points = np.asarray(points, dtype=np.int64)
+        self.keyframe_interval = keyframe_interval
+        self.max_error = max_error
+        self.max_motion = max_motion
+        self.tracking_width = tracking_width
+        self.detection_timeout = detection_timeout
+        self.frames_tracked = 0
+        self.tracking_lost = 0
+        self._lock = threading.Lock()
+        self._landmarks = None
+        self._prev_gray = None
+        self._since_detection = 0
+        self._submitted_at = None
+        self._lk_params = dict(
+            winSize=(21, 21),
+            maxLevel=3,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+
+    def prepare(self, bgr_frame):
+        """Small grayscale copy of a frame to track on."""
+        gray = cv2.cvtColor(bgr_frame, cv2.COLOR_BGR2GRAY)
+        scale = self.tracking_width / gray.shape[1]
+        if scale < 1:
+            gray = cv2.resize(
+                gray,
+                (self.tracking_width, max(1, int(gray.shape[0] * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        return gray
+
+    def set_keyframe(self, landmarks, gray):
+        """Start tracking from a landmarker result and the frame it came from."""
+        with self._lock:
+            self._landmarks = landmarks if len(landmarks) else None
+            self._prev_gray = gray
+            self._submitted_at = None
+
+    def reset(self):
+        """Forget the keyframe and any detection in flight; the next frame is detected."""
+        with self._lock:
+            self._landmarks = None
+            self._submitted_at = None
+
+    def detection_submitted(self):
+        with self._lock:
+            self._since_detection = 0
+            self._submitted_at = time.perf_counter()
+
+    def detection_in_flight(self):
+        """True while a submitted keyframe detection has not come back (or timed out)."""
+        with self._lock:
+            return (
+                self._submitted_at is not None
+                and time.perf_counter() - self._submitted_at < self.detection_timeout
+            )
+
+    def _lose(self):
+        self._landmarks = None
+        self.tracking_lost += 1
+
+    def track(self, gray):
+        """Return landmarks propagated to ``gray``, or None if it is time to detect."""
+        with self._lock:
+            if (
+                self._landmarks is None
+                or self._since_detection + 1 >= self.keyframe_interval
+            ):
+                return None
+            height, width = gray.shape
+            size = np.array([width, height], dtype=np.float32)
+            landmarks = self._landmarks
+            start = (landmarks[:, self.points, :2] * size).reshape(-1, 1, 2)
+            start = np.ascontiguousarray(start, dtype=np.float32)
+
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(
+                self._prev_gray, gray, start, None, **self._lk_params
+            )
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(
+                gray, self._prev_gray, moved, None, **self._lk_params
+            )
+            error = np.linalg.norm(back - start, axis=-1).ravel()
+            if (
+                not status.all()
+                or not back_status.all()
+                or error.max() > self.max_error
+            ):
+                self._lose()
+                return None
+
+            shift = (moved - start).reshape(len(landmarks), len(self.points), 2) / size
+            pose_shift = shift.mean(axis=1)
+            if np.abs(pose_shift).max() > self.max_motion:
+                self._lose()
+                return None
+
+            tracked = landmarks.copy()
+            tracked[..., :2] += pose_shift[:, None, :]
+            tracked[:, self.points, :2] = landmarks[:, self.points, :2] + shift
+            self._landmarks = tracked
+            self._prev_gray = gray
+            self._since_detection += 1
+            self.frames_tracked += 1
+            return tracked
+
+    def stats(self):
+        return {"tracked": self.frames_tracked, "lost": self.tracking_lost}
@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+import numpy as np
+
+TurnResult = namedtuple(
+    "TurnResult", ["moves", "confidence", "frames", "elapsed", "resolved_early"]
+)
+"""Outcome of one scanned turn; moves/confidence/frames are indexed by player id"""
+
+
+class StreamingVoter:
+    """Accumulates visibility-weighted gesture votes over a turn.
+
+    Each player's leading move only changes when a challenger beats it by
+    ``hysteresis`` of that player's total weight, so a few noisy frames don't
+    flip the result. A player is settled once they have at least
+    ``min_frames`` votes, the leader holds ``confidence_threshold`` of their
+    weight, and their last ``stable_frames`` frames agreed with it.
+    """
+
+    def __init__(
+        self,
+        num_players,
+        num_moves,
+        confidence_threshold=0.8,
+        min_frames=15,
+        hysteresis=0.1,
+        stable_frames=10,
+        default_move=0,
+    ):
+        self.confidence_threshold = confidence_threshold
+        self.min_frames = min_frames
+        self.hysteresis = hysteresis
+        self.stable_frames = stable_frames
+        # Row 0 collects poses that weren't assigned to a player.
+        self.scores = np.zeros((num_players + 1, num_moves), dtype=np.float64)
+        self.frames = np.zeros(num_players + 1, dtype=np.int64)
+        self.leader = np.full(num_players + 1, default_move, dtype=np.int64)
+        self.stable = np.zeros(num_players + 1, dtype=np.int64)
+
+    def add(self, player_ids, moves, weights):
+        """Add one frame's poses: arrays of player ids, move codes and weights."""
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        moves = np.asarray(moves, dtype=np.int64)
+        np.add.at(self.scores, (player_ids, moves), weights)
+
+        seen = np.zeros(len(self.frames), dtype=bool)
+        seen[player_ids] = True
+        self.frames += seen
+
+        rows = np.arange(len(self.scores))
+        best = self.scores.argmax(axis=1)
+        margin = self.scores[rows, best] - self.scores[rows, self.leader]
+        switch = (
+            seen
+            & (best != self.leader)
+            & (margin > self.hysteresis * self.scores.sum(axis=1))
+        )
+        self.leader = np.where(switch, best, self.leader)
+
+        frame_moves = np.full(len(self.frames), -1, dtype=np.int64)
+        frame_moves[player_ids] = moves
+        agree = seen & (frame_moves == self.leader)
+        self.stable = np.where(
+            switch | (seen & ~agree), 0, np.where(agree, self.stable + 1, self.stable)
+        )
+
+    def confidence(self):
+        """Share of each player's total weight held by their leading move."""
+        totals = self.scores.sum(axis=1)
+        leading = self.scores[np.arange(len(self.scores)), self.leader]
+        return np.divide(
+            leading, totals, out=np.zeros_like(totals), where=totals > 0
+        )
+
+    def settled(self, players):
+        """Whether every player in ``players`` has a stable, confident move."""
+        players = np.asarray(players)
+        return bool(
+            np.all(
+                (self.frames[players] >= self.min_frames)
+                & (self.confidence()[players] >= self.confidence_threshold)
+                & (self.stable[players] >= self.stable_frames)
+            )
+        )
+
+
+async def count_votes(pose_frames, voter, players, early_resolution=True):
+    """Add the actions of every PoseFrame from the ``pose_frames`` asyncio.Queue to ``voter``.
+
+    Runs until the players in ``players`` are settled (with
+    ``early_resolution``) or the task is cancelled at the end of the turn.
+    """
+    while True:
+        pose_frame = await pose_frames.get()
+        voter.add(*pose_frame.actions)
+        if early_resolution and voter.settled(players):
+            return
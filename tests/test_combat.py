@@ -0,0 +1,79 @@
+import itertools
+import random
+
+import combat
+
+
+def reference_turn(fighters, moves, rng):
+    """The two-player rules of the engine's original process_round_moves.
+
+    Player 1's move is applied before player 2's, as the engine did; the
+    defense roll uses rng.random() < 0.5 where the engine used
+    random.choice([True, False]).
+    """
+    health = [fighters[0].health, fighters[1].health]
+    mana = [fighters[0].mana, fighters[1].mana]
+    for actor, target in ((0, 1), (1, 0)):
+        move, target_move = moves[actor], moves[target]
+        if move == "Attack":
+            if mana[actor] >= 20:
+                mana[actor] -= 20
+                if target_move == "Defending":
+                    damage = max(fighters[actor].attack - fighters[target].defense, 0)
+                    fully_efficient = rng.random() < 0.5
+                    reduction = rng.uniform(0.4, 0.8)
+                    damage = 0 if fully_efficient else int(damage * (1 - reduction))
+                elif target_move == "Resting":
+                    damage = int(fighters[actor].attack * 1.5)
+                else:
+                    damage = fighters[actor].attack
+                health[target] -= damage
+        elif move == "Defending":
+            if mana[actor] >= 20:
+                mana[actor] -= 20
+        elif move == "Resting":
+            mana[actor] += rng.randint(20, 35)
+        elif move == "Healing":
+            if mana[actor] >= 30:
+                mana[actor] -= 30
+                health[actor] += rng.randint(15, 30)
+        elif move == "Special Attack":
+            if mana[actor] >= 50:
+                mana[actor] -= 50
+                health[target] -= fighters[actor].attack * 2
+    return health, mana
+
+
+def test_resolve_turn_matches_original_engine():
+    for (move_a, move_b), mana_a, mana_b, seed in itertools.product(
+        itertools.product(combat.MOVES, repeat=2), (0, 19, 20, 30, 49, 50, 120), (20, 60), range(20)
+    ):
+        fighters = (
+            combat.Fighter(health=120, mana=mana_a, attack=25, defense=5),
+            combat.Fighter(health=90, mana=mana_b, attack=30, defense=40),
+        )
+        outcome = combat.resolve_turn(fighters, (move_a, move_b), rng=random.Random(seed))
+        health, mana = reference_turn(fighters, (move_a, move_b), random.Random(seed))
+        assert [state.health for state in outcome.fighters] == health, (move_a, move_b, seed)
+        assert [state.mana for state in outcome.fighters] == mana, (move_a, move_b, seed)
+
+
+def test_resolve_turn_accepts_move_aliases():
+    fighters = (combat.Fighter(100, 100, 25, 5), combat.Fighter(100, 100, 30, 1))
+    outcome = combat.resolve_turn(fighters, ("Attacking", "Attack"), rng=random.Random(0))
+    assert [state.health for state in outcome.fighters] == [70, 75]
+    assert [event.kind for event in outcome.events] == ["attack", "attack"]
+
+
+def test_fallen_fighters_sit_the_turn_out():
+    fighters = (
+        combat.Fighter(0, 100, 25, 5),
+        combat.Fighter(100, 100, 30, 1),
+        combat.Fighter(100, 100, 20, 1),
+    )
+    outcome = combat.resolve_turn(
+        fighters, ("Attack", "Attack", "Attack"), rng=random.Random(0)
+    )
+    # The fallen fighter neither acts nor is targeted by the one before it.
+    assert [event.actor for event in outcome.events] == [1, 2]
+    assert [state.health for state in outcome.fighters] == [0, 80, 70]
@@ -0,0 +1,74 @@
+import itertools
+import random
+
+import numpy as np
+
+import combat
+
+FIGHTERS = (
+    combat.Fighter(health=120, mana=60, attack=25, defense=5),
+    combat.Fighter(health=90, mana=40, attack=30, defense=10),
+)
+RANDOM_MOVES = {"Resting", "Healing"}
+
+
+def is_random(move_a, move_b):
+    return (
+        move_a in RANDOM_MOVES
+        or move_b in RANDOM_MOVES
+        or {move_a, move_b} == {"Attack", "Defending"}
+    )
+
+
+def batch(moves, count, fighters=FIGHTERS):
+    states = combat.fighter_array([fighters] * count)
+    codes = np.tile([combat.MOVES.index(move) for move in moves], (count, 1))
+    return states, codes
+
+
+def test_deterministic_turns_match_resolve_turn():
+    for moves in itertools.product(combat.MOVES, repeat=2):
+        if is_random(*moves):
+            continue
+        for mana_a, mana_b in itertools.product((0, 20, 30, 50), repeat=2):
+            fighters = (FIGHTERS[0]._replace(mana=mana_a), FIGHTERS[1]._replace(mana=mana_b))
+            states, codes = batch(moves, 1, fighters)
+            resolved = combat.resolve_turns(states, codes, np.random.default_rng(0))
+            expected = combat.resolve_turn(fighters, moves).fighters
+            assert resolved["health"][0].tolist() == [state.health for state in expected], moves
+            assert resolved["mana"][0].tolist() == [state.mana for state in expected], moves
+
+
+def test_random_turns_match_resolve_turn_in_distribution():
+    count = 20000
+    rng = random.Random(0)
+    for moves in itertools.product(combat.MOVES, repeat=2):
+        if not is_random(*moves):
+            continue
+        states, codes = batch(moves, count)
+        resolved = combat.resolve_turns(states, codes, np.random.default_rng(0))
+        scalar = np.array(
+            [
+                [
+                    (state.health, state.mana)
+                    for state in combat.resolve_turn(FIGHTERS, moves, rng=rng).fighters
+                ]
+                for _ in range(count)
+            ]
+        )
+        for field, index in (("health", 0), ("mana", 1)):
+            batched = resolved[field]
+            expected = scalar[..., index]
+            # Same range of outcomes and the same mean, within sampling noise.
+            assert np.array_equal(batched.min(axis=0), expected.min(axis=0)), (moves, field)
+            assert np.array_equal(batched.max(axis=0), expected.max(axis=0)), (moves, field)
+            standard_error = np.sqrt(batched.var(axis=0) / count + expected.var(axis=0) / count)
+            difference = np.abs(batched.mean(axis=0) - expected.mean(axis=0))
+            assert np.all(difference <= 5 * standard_error + 1e-9), (moves, field)
+
+
+def test_finished_matches_are_carried_over():
+    fighters = (FIGHTERS[0]._replace(health=0), FIGHTERS[1])
+    states, codes = batch(("Special Attack", "Resting"), 3, fighters)
+    resolved = combat.resolve_turns(states, codes, np.random.default_rng(0))
+    assert np.array_equal(resolved, states)
@@ -0,0 +1,86 @@
+import numpy as np
+
+import combat
+import gestures
+
+TORSO_LENGTH_ARM_RATIO = 0.35
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+LEFT_WRIST, RIGHT_WRIST = 15, 16
+LEFT_HIP, RIGHT_HIP = 23, 24
+X, Y, VISIBILITY = 0, 1, 3
+
+
+def reference_move(pose):
+    """The hand-written define_action the gesture table replaced, on one (33, 4) pose."""
+    right_wrist, left_wrist = pose[RIGHT_WRIST], pose[LEFT_WRIST]
+    right_shoulder, left_shoulder = pose[RIGHT_SHOULDER], pose[LEFT_SHOULDER]
+    right_hip, left_hip = pose[RIGHT_HIP], pose[LEFT_HIP]
+
+    if right_shoulder[X] == 0:
+        center_x = left_shoulder[X]
+    elif left_shoulder[X] == 0:
+        center_x = right_shoulder[X]
+    else:
+        center_x = np.average([right_shoulder[X], left_shoulder[X]])
+
+    if right_hip[Y] == 0:
+        torso_length = np.abs(left_hip[Y] - left_shoulder[Y])
+    elif left_hip[Y] == 0:
+        torso_length = np.abs(right_hip[Y] - right_shoulder[Y])
+    else:
+        torso_length = np.average(
+            [np.abs(right_hip[Y] - right_shoulder[Y]), np.abs(left_hip[Y] - left_shoulder[Y])]
+        )
+
+    if any(
+        point[VISIBILITY] == 0
+        for point in (right_wrist, left_wrist, right_shoulder, left_shoulder, right_hip, left_hip)
+    ):
+        return "Resting"
+    reach = TORSO_LENGTH_ARM_RATIO * torso_length
+    if abs(right_wrist[X] - center_x) > reach or abs(left_wrist[X] - center_x) > reach:
+        if (
+            right_wrist[Y] < right_hip[Y] - reach and abs(left_wrist[X] - center_x) > reach
+        ) or (left_wrist[Y] < left_hip[Y] - reach and abs(right_wrist[X] - center_x) > reach):
+            return "Special Attack"
+        return "Attack"
+    if (
+        right_wrist[Y] < right_hip[Y] - 0.2 * torso_length and right_wrist[Y] > right_shoulder[Y]
+    ) or (left_wrist[Y] < left_hip[Y] - 0.2 * torso_length and left_wrist[Y] > left_shoulder[Y]):
+        return "Defending"
+    if right_wrist[Y] < right_shoulder[Y] + 0.15 * torso_length or left_wrist[Y] < (
+        left_shoulder[Y] + 0.15 * torso_length
+    ):
+        return "Healing"
+    return "Resting"
+
+
+def random_poses(count, seed=0):
+    """Random poses around a standing body, with some landmarks missing or at 0."""
+    rng = np.random.default_rng(seed)
+    poses = rng.uniform(0, 1, size=(count, 33, 4))
+    poses[:, [LEFT_SHOULDER, RIGHT_SHOULDER], Y] = rng.uniform(0.2, 0.4, size=(count, 2))
+    poses[:, [LEFT_HIP, RIGHT_HIP], Y] = rng.uniform(0.6, 0.8, size=(count, 2))
+    poses[:, [LEFT_SHOULDER, RIGHT_SHOULDER], X] = rng.uniform(0.4, 0.6, size=(count, 2))
+    poses[..., VISIBILITY] = np.where(rng.random((count, 33)) < 0.02, 0, poses[..., VISIBILITY])
+    poses[:, LEFT_SHOULDER, X] = np.where(rng.random(count) < 0.05, 0, poses[:, LEFT_SHOULDER, X])
+    poses[:, RIGHT_HIP, Y] = np.where(rng.random(count) < 0.05, 0, poses[:, RIGHT_HIP, Y])
+    return poses
+
+
+def test_gesture_table_matches_reference_rules():
+    rules = gestures.load_rules(combat.MOVES)
+    poses = random_poses(20000)
+    codes = rules.classify(poses)
+    expected = [reference_move(pose) for pose in poses]
+    assert [combat.MOVES[code] for code in codes] == expected
+    # Every move is actually exercised.
+    assert set(expected) == set(combat.MOVES)
+
+
+def test_gesture_table_classifies_batches_like_single_poses():
+    rules = gestures.load_rules(combat.MOVES)
+    poses = random_poses(60, seed=1)
+    batched = rules.classify(poses.reshape(3, 20, 33, 4))
+    assert batched.shape == (3, 20)
+    assert np.array_equal(batched.ravel(), [rules.classify(pose) for pose in poses])
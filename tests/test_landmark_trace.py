@@ -0,0 +1,64 @@
+import numpy as np
+
+import gestures
+import imaging
+import landmark_trace
+
+INDEX = gestures.LANDMARK_INDEX
+
+
+def pose(center_x, left_wrist, right_wrist):
+    """A standing pose centered on ``center_x`` with the given (x offset, y) wrists."""
+    landmarks = np.zeros((33, 4), dtype=np.float32)
+    landmarks[:, 3] = 1.0
+    landmarks[INDEX["nose"], :2] = (center_x, 0.2)
+    landmarks[INDEX["left_shoulder"], :2] = (center_x + 0.05, 0.3)
+    landmarks[INDEX["right_shoulder"], :2] = (center_x - 0.05, 0.3)
+    landmarks[INDEX["left_hip"], :2] = (center_x + 0.04, 0.7)
+    landmarks[INDEX["right_hip"], :2] = (center_x - 0.04, 0.7)
+    landmarks[INDEX["left_wrist"], :2] = (center_x + left_wrist[0], left_wrist[1])
+    landmarks[INDEX["right_wrist"], :2] = (center_x + right_wrist[0], right_wrist[1])
+    return landmarks
+
+
+ARMS_DOWN = (0.0, 0.75)
+ARM_OUT = (0.3, 0.5)
+HANDS_UP = (0.0, 0.2)
+
+
+def test_recorded_trace_replays_to_the_recorded_moves(tmp_path):
+    path = tmp_path / "turn.trace"
+    attacking = pose(0.25, ARM_OUT, ARMS_DOWN)
+    healing = pose(0.75, HANDS_UP, HANDS_UP)
+    with landmark_trace.TraceWriter(
+        str(path),
+        max_poses=2,
+        metadata={"solo_play": False, "num_players": 2, "player_zones": None},
+    ) as writer:
+        for frame in range(20):
+            writer.write(1000 + 33 * frame, np.stack([attacking, healing]))
+        # Frames where only one player was found still replay.
+        for frame in range(20, 25):
+            writer.write(1000 + 33 * frame, attacking[None])
+
+    header, records = landmark_trace.read_trace(str(path))
+    assert isinstance(records, np.memmap)
+    assert header["num_players"] == 2
+    assert records["num_poses"].tolist() == [2] * 20 + [1] * 5
+    assert records["timestamp_ms"][-1] == 1000 + 33 * 24
+
+    vision_options = dict(imaging.DEFAULT_VISION_OPTIONS, min_turn_frames=15, stable_frames=10)
+    outcome = landmark_trace.replay(str(path), vision_options=vision_options)
+    assert outcome["frames"] == 25
+    assert outcome["result"] == ["Attack", "Healing"]
+    assert outcome["confidence"] == [1.0, 1.0]
+    assert outcome["settled_at"] == 14
+    assert outcome["player_ids"][20:, 1].tolist() == [0] * 5
+
+
+def test_empty_trace_reads_back_without_records(tmp_path):
+    path = tmp_path / "empty.trace"
+    landmark_trace.TraceWriter(str(path), max_poses=3).close()
+    header, records = landmark_trace.read_trace(str(path))
+    assert header["max_poses"] == 3
+    assert len(records) == 0
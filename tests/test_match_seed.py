@@ -0,0 +1,51 @@
+import random
+
+import ai
+import combat
+import Player_List
+import simulate
+
+
+def play(seed, turns=30):
+    """Starting stats plus every turn's moves and outcome of an AI-vs-AI match."""
+    seed, rng = combat.match_rng(seed)
+    fighters = (
+        combat.fighter(Player_List.Draco(rng=rng)),
+        combat.fighter(Player_List.Hydra(rng=rng)),
+    )
+    bots = (simulate.PolicyBot(1), simulate.PolicyBot(1))
+    history = [fighters]
+    for _ in range(turns):
+        for bot, fighter in zip(bots, fighters):
+            bot.fighter = fighter
+        moves = (
+            ai.wizard_bot_turn(bots[0], bots[1], rng=rng),
+            ai.wizard_bot_turn(bots[1], bots[0], rng=rng),
+        )
+        outcome = combat.resolve_turn(fighters, moves, rng=rng)
+        fighters = outcome.fighters
+        history.append((moves, outcome))
+    return seed, history
+
+
+def test_same_seed_replays_the_same_match():
+    assert play(1234) == play(1234)
+
+
+def test_different_seeds_play_different_matches():
+    assert play(1234)[1] != play(1235)[1]
+
+
+def test_generated_seed_reproduces_the_match():
+    seed, history = play(None)
+    assert isinstance(seed, int)
+    assert play(seed) == (seed, history)
+
+
+def test_simulated_matches_depend_only_on_their_seed():
+    match = ("Lyra", "Orion", "fsm", "random")
+    seed = simulate.match_seed(7, 3, 11)
+    first = simulate.play_match(*match, rng=random.Random(seed))
+    # Draws from the global random module in between must not matter.
+    random.random()
+    assert simulate.play_match(*match, rng=random.Random(seed)) == first
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+REPO = os.path.dirname(SRC)
+HEADLESS = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+
+POOL_SCRIPT = """
+import sys
+import time
+import types
+
+sys.path.insert(0, {src!r})
+from mediapipe.tasks.python import vision
+
+
+class FakeLandmarker:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def detect_for_video(self, image, timestamp_ms):
+        return types.SimpleNamespace(pose_landmarks=[])
+
+
+# Import-time side effect: spawned workers re-import this script as
+# __mp_main__, so they pick up the fake landmarker too.
+vision.PoseLandmarker.create_from_options = staticmethod(lambda options: FakeLandmarker())
+
+import numpy as np
+
+import imaging
+import pose_worker
+
+if __name__ == "__main__":
+    pool = pose_worker.InferencePool(imaging.load_vision_options(), "full", max_side=64)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 60
+        heartbeat = pool._workers[0]["heartbeat"]
+        while heartbeat.value == 0.0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print("heartbeat", heartbeat.value > 0)
+        pool.submit(np.zeros((64, 64, 3), dtype=np.uint8), 1)
+        results = []
+        while not results and time.monotonic() < deadline:
+            results = pool.poll()
+            time.sleep(0.05)
+        print("results", [timestamp_ms for timestamp_ms, _ in results])
+    finally:
+        pool.stop()
+"""
+
+
+def test_pool_started_from_a_script_gets_heartbeats(tmp_path):
+    script = tmp_path / "start_pool.py"
+    script.write_text(textwrap.dedent(POOL_SCRIPT.format(src=SRC)))
+    completed = subprocess.run(
+        [sys.executable, str(script)],
+        cwd=REPO,
+        env=HEADLESS,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert "heartbeat True" in completed.stdout
+    assert "results [1]" in completed.stdout
+
+
+def test_main_module_is_inert_when_reimported_by_workers():
+    # What a spawned worker does with the game's entry script.
+    code = (
+        "import runpy, sys, pygame\n"
+        f"sys.path.insert(0, {SRC!r})\n"
+        f"runpy.run_path({os.path.join(SRC, 'main.py')!r}, run_name='__mp_main__')\n"
+        "print('display', pygame.display.get_surface())\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO,
+        env=HEADLESS,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert "display None" in completed.stdout
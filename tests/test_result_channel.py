@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import numpy as np
+
+import result_channel
+import voting
+
+
+def actions(player, move):
+    return np.array([player]), np.array([move]), np.array([1.0])
+
+
+def test_voter_sees_every_frame_of_a_burst():
+    count = 200
+
+    async def run_turn():
+        channel = result_channel.ResultChannel()
+        voter = voting.StreamingVoter(2, 5)
+        pose_frames, listener = channel.subscribe(asyncio.get_running_loop())
+        votes = asyncio.ensure_future(
+            voting.count_votes(pose_frames, voter, [1, 2], early_resolution=False)
+        )
+
+        def publish_burst():
+            for timestamp_ms in range(1, count + 1):
+                channel.publish(timestamp_ms, None, None, actions(1 + timestamp_ms % 2, 2))
+
+        # Published from another thread, as the landmarker callback does.
+        publisher = threading.Thread(target=publish_burst)
+        publisher.start()
+        await asyncio.get_running_loop().run_in_executor(None, publisher.join)
+        while not pose_frames.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        votes.cancel()
+        channel.remove_listener(listener)
+        return voter
+
+    voter = asyncio.run(run_turn())
+    assert voter.frames.tolist() == [0, count // 2, count // 2]
+
+
+def test_listeners_get_frames_in_sequence_order():
+    channel = result_channel.ResultChannel()
+    seen = []
+    channel.add_listener(lambda pose_frame: seen.append(pose_frame.sequence))
+    assert channel.publish(10, None, None, actions(1, 0))
+    assert not channel.publish(5, None, None, actions(1, 0))
+    assert channel.publish(11, None, None, actions(1, 0))
+    assert seen == [1, 2]
+    assert channel.rejected == 1
+    assert channel.poll(1).timestamp_ms == 11
+    assert channel.poll(2) is None
@@ -0,0 +1,59 @@
+import numpy as np
+
+import voting
+
+NUM_MOVES = 5
+RESTING, DEFENDING, ATTACK, HEALING = range(4)
+
+
+def vote(voter, moves, weight=1.0):
+    """One frame with one pose per player; ``moves`` lists the move of players 1.."""
+    players = np.arange(1, len(moves) + 1)
+    voter.add(players, np.array(moves), np.full(len(moves), weight))
+
+
+def test_clear_leader_resolves_once_frames_and_stability_are_reached():
+    voter = voting.StreamingVoter(2, NUM_MOVES, min_frames=15, stable_frames=10)
+    for _ in range(15):
+        assert not voter.settled([1, 2])
+        vote(voter, [ATTACK, HEALING])
+    assert voter.settled([1, 2])
+    assert voter.leader[1:].tolist() == [ATTACK, HEALING]
+    assert voter.confidence()[1:].tolist() == [1.0, 1.0]
+
+
+def test_flicker_under_the_hysteresis_margin_keeps_the_leader():
+    voter = voting.StreamingVoter(1, NUM_MOVES, hysteresis=0.1)
+    for _ in range(10):
+        vote(voter, [ATTACK])
+    # The challenger overtakes on score, but by less than 10% of the total.
+    for _ in range(10):
+        vote(voter, [DEFENDING])
+    vote(voter, [DEFENDING], weight=0.5)
+    assert voter.scores[1, DEFENDING] > voter.scores[1, ATTACK]
+    assert voter.leader[1] == ATTACK
+    assert voter.stable[1] == 0
+    # A clear lead does switch it.
+    for _ in range(3):
+        vote(voter, [DEFENDING])
+    assert voter.leader[1] == DEFENDING
+
+
+def test_min_frames_holds_back_a_confident_stable_move():
+    voter = voting.StreamingVoter(1, NUM_MOVES, min_frames=15, stable_frames=1)
+    for _ in range(14):
+        vote(voter, [HEALING])
+        assert voter.confidence()[1] == 1.0
+        assert not voter.settled([1])
+    # Confident and stable for a while already; only the frame count was missing.
+    assert voter.stable[1] >= 1
+    vote(voter, [HEALING])
+    assert voter.settled([1])
+
+
+def test_unassigned_poses_do_not_count_for_players():
+    voter = voting.StreamingVoter(1, NUM_MOVES, min_frames=1, stable_frames=0)
+    voter.add(np.array([0]), np.array([ATTACK]), np.array([1.0]))
+    assert voter.frames.tolist() == [1, 0]
+    assert voter.leader[1] == RESTING
+    assert not voter.settled([1])